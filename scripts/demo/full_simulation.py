@@ -247,15 +247,12 @@ class PoolMindSimulation:
                 if key == ord("q") or key == 27:  # Quit
                     break
                 elif key == ord(" "):  # Pot random ball
-                    active_balls = [
-                        b
-                        for b in self.virtual_table.balls
-                        if b["active"] and b["id"] > 0
-                    ]
-                    if active_balls:
+                    balls = self.virtual_table.balls
+                    active_balls = balls["id"][balls["active"] & (balls["id"] > 0)]
+                    if len(active_balls):
                         rng = np.random.default_rng(int(time.time()))
                         ball_to_pot = rng.choice(active_balls)
-                        self.virtual_table.pot_ball(ball_to_pot["id"])
+                        self.virtual_table.pot_ball(int(ball_to_pot))
                 elif key == ord("r"):  # Reset
                     self.virtual_table.reset_balls()
                     # Reset tracker manually since it doesn't have reset method
@@ -266,16 +263,13 @@ class PoolMindSimulation:
 
                 # Auto-demo: pot balls occasionally
                 if self.frame_count % 400 == 0:  # Every ~13 seconds
-                    active_balls = [
-                        b
-                        for b in self.virtual_table.balls
-                        if b["active"] and b["id"] > 0
-                    ]
-                    if active_balls and len(active_balls) > 2:
+                    balls = self.virtual_table.balls
+                    active_balls = balls["id"][balls["active"] & (balls["id"] > 0)]
+                    if len(active_balls) > 2:
                         rng = np.random.default_rng(int(time.time()) + self.frame_count)
                         ball_to_pot = rng.choice(active_balls)
-                        self.virtual_table.pot_ball(ball_to_pot["id"])
-                        print(f"🎱 Auto-demo: Ball {ball_to_pot['id']} potted")
+                        self.virtual_table.pot_ball(int(ball_to_pot))
+                        print(f"🎱 Auto-demo: Ball {ball_to_pot} potted")
 
         except KeyboardInterrupt:
             print("\n🛑 Simulation interrupted by user")
@@ -282,15 +282,12 @@ class SimplePoolMindDemo:
                 if key == ord("q") or key == 27:  # Quit
                     break
                 elif key == ord(" "):  # Pot random ball
-                    active_balls = [
-                        b
-                        for b in self.virtual_table.balls
-                        if b["active"] and b["id"] > 0
-                    ]
-                    if active_balls:
+                    balls = self.virtual_table.balls
+                    active_balls = balls["id"][balls["active"] & (balls["id"] > 0)]
+                    if len(active_balls):
                         rng = np.random.default_rng(int(time.time()))
                         ball_to_pot = rng.choice(active_balls)
-                        self.virtual_table.pot_ball(ball_to_pot["id"])
+                        self.virtual_table.pot_ball(int(ball_to_pot))
                 elif key == ord("r"):  # Reset
                     self.virtual_table.reset_balls()
                     self.frame_count = 0
@@ -299,16 +296,13 @@ class SimplePoolMindDemo:
 
                 # Auto-demo: pot balls occasionally
                 if self.frame_count % 300 == 0:  # Every 10 seconds
-                    active_balls = [
-                        b
-                        for b in self.virtual_table.balls
-                        if b["active"] and b["id"] > 0
-                    ]
-                    if active_balls and len(active_balls) > 2:
+                    balls = self.virtual_table.balls
+                    active_balls = balls["id"][balls["active"] & (balls["id"] > 0)]
+                    if len(active_balls) > 2:
                         rng = np.random.default_rng(int(time.time()) + self.frame_count)
                         ball_to_pot = rng.choice(active_balls)
-                        self.virtual_table.pot_ball(ball_to_pot["id"])
-                        print(f"🎱 Auto-demo: Ball {ball_to_pot['id']} potted")
+                        self.virtual_table.pot_ball(int(ball_to_pot))
+                        print(f"🎱 Auto-demo: Ball {ball_to_pot} potted")
 
         except KeyboardInterrupt:
             print("\n🛑 Demo interrupted by user")
@@ -4,12 +4,28 @@ Virtual Pool Table Simulator for PoolMind
 Creates synthetic camera frames with ArUco markers and simulated balls
 """
 import math
+import sys
 import time
 from pathlib import Path
 
 import cv2
 import numpy as np
-import yaml
+
+sys.path.insert(0, "src")
+
+from poolmind.util.cfg import load_config
+
+# One record per simulated ball, stored contiguously
+BALL_DTYPE = np.dtype(
+    [
+        ("id", "i4"),
+        ("active", "?"),
+        ("x", "f8"),
+        ("y", "f8"),
+        ("color", "3u1"),
+        ("type", "U6"),
+    ]
+)
 
 
 class VirtualPoolTable:
@@ -19,8 +35,7 @@ class VirtualPoolTable:
 
     def __init__(self, config_path="config/config.yaml"):
         # Load configuration
-        with open(config_path, "r") as f:
-            self.cfg = yaml.safe_load(f)
+        self.cfg = load_config(config_path)
 
         # Camera settings
         self.width = self.cfg["camera"]["width"]
@@ -42,15 +57,23 @@ class VirtualPoolTable:
         try:
             self.aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
             self.markers = self._generate_aruco_markers()
+            self._marker_patches = self._compose_marker_patches()
             print("   ArUco markers: Generated successfully")
         except Exception as e:
             print(f"   ArUco markers: Failed to generate ({e})")
             self.markers = {}
+            self._marker_patches = {}
 
         # Ball simulation
         self.ball_radius = 12  # ball radius in pixels
         self.balls = self._initialize_balls()
 
+        # Table, markers and static labels never change between frames, so
+        # render them once and copy per frame
+        self._bg = None
+        self._marker_rects = []
+        self.invalidate_background()
+
         print("🎱 Virtual Table initialized:")
         print(f"   Frame size: {self.width}x{self.height}")
         print(f"   Table area: {self.table_width}x{self.table_height}")
@@ -73,23 +96,24 @@ class VirtualPoolTable:
                 markers[marker_id] = None
         return markers
 
+    def _compose_marker_patches(self):
+        """Pre-composite each marker onto its white contrast border"""
+        pad = self.marker_size + 11  # 5px border, 6px incl. rectangle end point
+        patches = {}
+        for marker_id, marker_bgr in self.markers.items():
+            if marker_bgr is None:
+                continue
+            patch = np.full((pad, pad, 3), 255, dtype=np.uint8)
+            patch[5 : 5 + self.marker_size, 5 : 5 + self.marker_size] = marker_bgr
+            patches[marker_id] = patch
+        return patches
+
     def _initialize_balls(self):
         """Initialize ball positions for 8-ball pool with collision detection"""
-        balls = []
-
         # Cue ball (white) - left side
         cue_x = self.table_x + self.table_width // 4
         cue_y = self.table_y + self.table_height // 2
-        balls.append(
-            {
-                "id": 0,
-                "type": "cue",
-                "color": (255, 255, 255),
-                "x": cue_x,
-                "y": cue_y,
-                "active": True,
-            }
-        )
+        balls = [(0, True, cue_x, cue_y, (255, 255, 255), "cue")]
 
         # Rack formation - proper triangle with collision detection
         rack_x = self.table_x + 3 * self.table_width // 4
@@ -149,30 +173,15 @@ class VirtualPoolTable:
                 ball_type = "eight"
             color = ball_colors[min(i, len(ball_colors) - 1)]
 
-            balls.append(
-                {
-                    "id": ball_id,
-                    "type": ball_type,
-                    "color": color,
-                    "x": rack_x + dx,
-                    "y": rack_y + dy,
-                    "active": True,
-                }
-            )
+            balls.append((ball_id, True, rack_x + dx, rack_y + dy, color, ball_type))
 
-        return balls
+        # Per-ball animation phase
+        self._phase = np.arange(len(balls), dtype=np.float64)
+
+        return np.array(balls, dtype=BALL_DTYPE)
 
     def _draw_table(self, frame):
         """Draw the pool table background"""
-        # Table felt (green)
-        cv2.rectangle(
-            frame,
-            (self.table_x, self.table_y),
-            (self.table_x + self.table_width, self.table_y + self.table_height),
-            (34, 139, 34),
-            -1,
-        )  # Forest green
-
         # Table rails (brown)
         rail_width = 20
         cv2.rectangle(
@@ -216,9 +225,13 @@ class VirtualPoolTable:
             cv2.circle(frame, (px, py), pocket_radius, (0, 0, 0), -1)
 
     def _place_aruco_markers(self, frame):
-        """Place ArUco markers at table corners with white background for contrast"""
+        """Place ArUco markers at table corners with white background for contrast
+
+        Returns the (x1, y1, x2, y2) areas covered by each marker patch.
+        """
+        rects = []
         if not self.markers:
-            return
+            return rects
 
         marker_offset = 50  # Reduced offset
 
@@ -247,32 +260,27 @@ class VirtualPoolTable:
             x = max(0, min(x, frame.shape[1] - self.marker_size))
             y = max(0, min(y, frame.shape[0] - self.marker_size))
 
-            # Add white background for contrast
-            cv2.rectangle(
-                frame,
-                (x - 5, y - 5),
-                (x + self.marker_size + 5, y + self.marker_size + 5),
-                (255, 255, 255),
-                -1,
-            )
+            # Marker on white background for contrast, clipped to the frame
+            patch = self._marker_patches[marker_id]
+            x1, y1 = x - 5, y - 5
+            fx1, fy1 = max(0, x1), max(0, y1)
+            fx2 = min(frame.shape[1], x1 + patch.shape[1])
+            fy2 = min(frame.shape[0], y1 + patch.shape[0])
+            frame[fy1:fy2, fx1:fx2] = patch[fy1 - y1 : fy2 - y1, fx1 - x1 : fx2 - x1]
+            rects.append((fx1, fy1, fx2, fy2))
 
-            marker_img = self.markers[marker_id]
-
-            # Place marker on white background
-            try:
-                frame[y : y + self.marker_size, x : x + self.marker_size] = marker_img
-            except Exception as e:
-                print(f"Failed to place marker {marker_id} at ({x},{y}): {e}")
+        return rects
 
     def _draw_balls(self, frame):
         """Draw balls on the table"""
-        for ball in self.balls:
-            if not ball["active"]:
-                continue
-
-            x, y = int(ball["x"]), int(ball["y"])
-            color = ball["color"]
-
+        active = self.balls[self.balls["active"]]
+        for ball_id, x, y, color, ball_type in zip(
+            active["id"].tolist(),
+            active["x"].astype(int).tolist(),
+            active["y"].astype(int).tolist(),
+            active["color"].tolist(),
+            active["type"].tolist(),
+        ):
             # Draw ball shadow
             cv2.circle(frame, (x + 2, y + 2), self.ball_radius, (0, 0, 0), -1)
 
@@ -280,11 +288,11 @@ class VirtualPoolTable:
             cv2.circle(frame, (x, y), self.ball_radius, color, -1)
 
             # Draw ball number
-            if ball["id"] > 0:  # Don't number the cue ball
+            if ball_id > 0:  # Don't number the cue ball
                 text_color = (0, 0, 0) if sum(color) > 400 else (255, 255, 255)
                 cv2.putText(
                     frame,
-                    str(ball["id"]),
+                    str(ball_id),
                     (x - 6, y + 4),
                     cv2.FONT_HERSHEY_SIMPLEX,
                     0.4,
@@ -293,52 +301,42 @@ class VirtualPoolTable:
                 )
 
             # Draw stripe pattern for stripe balls
-            if ball["type"] == "stripe" and ball["id"] > 8:
+            if ball_type == "stripe" and ball_id > 8:
                 cv2.circle(frame, (x, y), self.ball_radius - 3, (255, 255, 255), 2)
 
     def animate_balls(self, frame_count):
         """Animate ball positions for more realistic simulation"""
         # Simple animation - balls drift slightly
-        for i, ball in enumerate(self.balls):
-            if ball["id"] == 0:  # Move cue ball slightly
-                ball["x"] += math.sin(frame_count * 0.02) * 0.5
-                ball["y"] += math.cos(frame_count * 0.03) * 0.3
-            else:
-                # Other balls have subtle motion
-                ball["x"] += math.sin(frame_count * 0.01 + i) * 0.2
-                ball["y"] += math.cos(frame_count * 0.015 + i) * 0.1
+        t = frame_count
+        # Other balls have subtle motion
+        x, y = self.balls["x"], self.balls["y"]
+        x[1:] += np.sin(t * 0.01 + self._phase[1:]) * 0.2
+        y[1:] += np.cos(t * 0.015 + self._phase[1:]) * 0.1
+        # Move cue ball slightly
+        x[0] += math.sin(t * 0.02) * 0.5
+        y[0] += math.cos(t * 0.03) * 0.3
 
     def pot_ball(self, ball_id):
         """Simulate potting a ball"""
-        for ball in self.balls:
-            if ball["id"] == ball_id:
-                ball["active"] = False
-                print(f"🎱 Ball {ball_id} potted!")
-                break
+        hit = self.balls["id"] == ball_id
+        if hit.any():
+            self.balls["active"][hit] = False
+            print(f"🎱 Ball {ball_id} potted!")
 
     def reset_balls(self):
         """Reset all balls to initial positions"""
         self.balls = self._initialize_balls()
         print("🎱 Balls reset to initial position")
 
-    def generate_frame(self, frame_count=0):
-        """Generate a single synthetic frame"""
-        # Create black background
-        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-
-        # Draw table elements
-        self._draw_table(frame)
-
-        # Animate and draw balls
-        self.animate_balls(frame_count)
-        self._draw_balls(frame)
-
-        # Place ArUco markers LAST (so they're not covered by noise)
-        self._place_aruco_markers(frame)
+    def invalidate_background(self):
+        """Re-render the cached static background (table, markers, labels)"""
+        bg = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self._draw_table(bg)
+        self._marker_rects = self._place_aruco_markers(bg)
 
         # Add title and debug info
         cv2.putText(
-            frame,
+            bg,
             "PoolMind Virtual Table",
             (10, 30),
             cv2.FONT_HERSHEY_SIMPLEX,
@@ -346,20 +344,11 @@ class VirtualPoolTable:
             (255, 255, 255),
             2,
         )
-        cv2.putText(
-            frame,
-            f"Frame: {frame_count}",
-            (10, self.height - 20),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (200, 200, 200),
-            1,
-        )
 
         # Add marker info for debugging
         active_markers = len([m for m in self.markers.values() if m is not None])
         cv2.putText(
-            frame,
+            bg,
             f"ArUco Markers: {active_markers}/4",
             (10, 70),
             cv2.FONT_HERSHEY_SIMPLEX,
@@ -368,7 +357,7 @@ class VirtualPoolTable:
             1,
         )
         cv2.putText(
-            frame,
+            bg,
             f"Marker size: {self.marker_size}px",
             (10, 100),
             cv2.FONT_HERSHEY_SIMPLEX,
@@ -376,6 +365,35 @@ class VirtualPoolTable:
             (200, 200, 200),
             1,
         )
+        self._bg = bg
+        self._frame_buf = np.empty_like(bg)
+
+    def generate_frame(self, frame_count=0):
+        """Generate a single synthetic frame
+
+        The frame is rendered into a reused buffer, so it is only valid until
+        the next call; copy it to keep it.
+        """
+        frame = self._frame_buf
+        np.copyto(frame, self._bg)
+
+        # Animate and draw balls
+        self.animate_balls(frame_count)
+        self._draw_balls(frame)
+
+        # Restore the ArUco markers over the balls (so they're never covered)
+        for x1, y1, x2, y2 in self._marker_rects:
+            frame[y1:y2, x1:x2] = self._bg[y1:y2, x1:x2]
+
+        cv2.putText(
+            frame,
+            f"Frame: {frame_count}",
+            (10, self.height - 20),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (200, 200, 200),
+            1,
+        )
 
         return frame
 
@@ -411,13 +429,12 @@ def main():
             if key == ord("q") or key == 27:  # Q or ESC
                 break
             elif key == ord(" "):  # SPACE - pot random ball
-                active_balls = [
-                    b for b in virtual_table.balls if b["active"] and b["id"] > 0
-                ]
-                if active_balls:
+                balls = virtual_table.balls
+                active_balls = balls["id"][balls["active"] & (balls["id"] > 0)]
+                if len(active_balls):
                     rng = np.random.default_rng(int(time.time()))
                     ball_to_pot = rng.choice(active_balls)
-                    virtual_table.pot_ball(ball_to_pot["id"])
+                    virtual_table.pot_ball(int(ball_to_pot))
             elif key == ord("r"):  # R - reset
                 virtual_table.reset_balls()
                 frame_count = 0
@@ -426,13 +443,12 @@ def main():
 
             # Auto-pot balls occasionally for demo
             if frame_count % 300 == 0:  # Every 10 seconds at 30fps
-                active_balls = [
-                    b for b in virtual_table.balls if b["active"] and b["id"] > 0
-                ]
-                if active_balls and len(active_balls) > 3:  # Keep some balls
+                balls = virtual_table.balls
+                active_balls = balls["id"][balls["active"] & (balls["id"] > 0)]
+                if len(active_balls) > 3:  # Keep some balls
                     rng = np.random.default_rng(int(time.time()) + frame_count)
                     ball_to_pot = rng.choice(active_balls)
-                    virtual_table.pot_ball(ball_to_pot["id"])
+                    virtual_table.pot_ball(int(ball_to_pot))
 
     except KeyboardInterrupt:
         print("\n🛑 Interrupted by user")
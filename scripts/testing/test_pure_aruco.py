@@ -56,12 +56,15 @@ def test_pure_aruco():
         (0, "Black"),
     ]
 
-    for bg_value, bg_name in test_backgrounds:
-        # Create frame with marker on different background
-        test_frame = np.ones((300, 300, 3), dtype=np.uint8) * bg_value
-        test_frame[90:210, 90:210] = marker_bgr
-
-        test_gray = cv2.cvtColor(test_frame, cv2.COLOR_BGR2GRAY)
+    # Detection only needs grayscale, so build every background variant as one
+    # gray batch and blit the marker into all of them at once
+    bg_values = np.array([bg for bg, _ in test_backgrounds], dtype=np.uint8)
+    batch = np.broadcast_to(
+        bg_values[:, None, None], (len(test_backgrounds), 300, 300)
+    ).copy()
+    batch[:, 90:210, 90:210] = marker_gray
+
+    for test_gray, (bg_value, bg_name) in zip(batch, test_backgrounds):
         _, test_ids, _ = detector.detectMarkers(test_gray)
 
         if test_ids is not None:
@@ -69,7 +72,7 @@ def test_pure_aruco():
         else:
             print(f"❌ {bg_name} background: NOT detected")
 
-        cv2.imwrite(f"test_bg_{bg_value}.jpg", test_frame)
+        cv2.imwrite(f"test_bg_{bg_value}.jpg", test_gray)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ Tests camera input and basic computer vision pipeline
 """
 import argparse
 import sys
+import threading
 import time
 from pathlib import Path
 
@@ -15,6 +16,15 @@ import yaml
 # Add src to Python path
 sys.path.insert(0, "src")
 
+# config `aruco:` key -> cv2.aruco.DetectorParameters attribute
+ARUCO_PARAM_KEYS = {
+    "adaptive_thresh_win_size_min": "adaptiveThreshWinSizeMin",
+    "adaptive_thresh_win_size_max": "adaptiveThreshWinSizeMax",
+    "adaptive_thresh_win_size_step": "adaptiveThreshWinSizeStep",
+    "min_marker_perimeter_rate": "minMarkerPerimeterRate",
+    "polygonal_approx_accuracy_rate": "polygonalApproxAccuracyRate",
+}
+
 
 class CameraTest:
     """
@@ -41,6 +51,9 @@ class CameraTest:
         height = cam_cfg.get("height", 720)
         fps = cam_cfg.get("fps", 30)
 
+        # MJPEG keeps USB bandwidth low; a 1-frame buffer avoids stale frames
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         self.cap.set(cv2.CAP_PROP_FPS, fps)
@@ -49,97 +62,250 @@ class CameraTest:
         actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        actual_fourcc = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4))
+        actual_fourcc = actual_fourcc.strip("\x00 ") or "unknown"
 
         print(f"✅ Camera {camera_id} opened successfully:")
         print(f"   Requested: {width}x{height} @ {fps}fps")
         print(f"   Actual: {actual_width}x{actual_height} @ {actual_fps}fps")
+        print(f"   Format: {actual_fourcc}")
+
+        # Detection parameters are constant across frames; resolve them once
+        detection_cfg = self.cfg.get("detection", {})
+        self._green_lo = np.array(
+            detection_cfg.get("hsv_green_lower", [35, 30, 30]), dtype=np.uint8
+        )
+        self._green_hi = np.array(
+            detection_cfg.get("hsv_green_upper", [85, 255, 255]), dtype=np.uint8
+        )
+        self._morph_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+        self._hough_dp = detection_cfg.get("hough_dp", 1.2)
+        self._hough_min_dist = detection_cfg.get("hough_min_dist", 16)
+        self._hough_param1 = detection_cfg.get("hough_param1", 120)
+        self._hough_param2 = detection_cfg.get("hough_param2", 18)
+        self._ball_min_radius = detection_cfg.get("ball_min_radius", 8)
+        self._ball_max_radius = detection_cfg.get("ball_max_radius", 18)
+        # Run Hough on a half-resolution image (accumulator cost drops ~4x)
+        self._hough_downscale = detection_cfg.get("hough_downscale", True)
+
+        # The felt is static from the camera's viewpoint, so the table mask is
+        # only rebuilt every `mask_period` frames or on a global brightness jump
+        self._mask_period = detection_cfg.get("mask_period", 15)
+        self._cached_mask = None
+        self._mask_frame_age = 0
+        self._prev_brightness = None
+
+        # Per-frame work buffers, (re)allocated when the frame size changes
+        self._work = {}
+        self._work_shape = None
+
+        self._detect_markers = self._init_aruco()
+
+        # Run the OpenCV primitives through the T-API (UMat) when an OpenCL
+        # device is present; otherwise stay on the plain NumPy path
+        self._use_opencl = cv2.ocl.haveOpenCL()
+        if self._use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        print(f"   OpenCL: {'ON' if self._use_opencl else 'OFF'}")
 
         # Stats
         self.frame_count = 0
         self.fps_counter = []
 
+        # Capture runs on its own thread; the main loop always consumes the
+        # most recent frame and older ones are dropped
+        self._latest_frame = None
+        self._frame_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._capture_failed = False
+
         # Detection modes
         self.show_aruco = True
         self.show_balls = True
         self.show_table_mask = False
 
+        # Pre-rendered static text, built lazily for the actual frame size
+        self._static_overlay = None
+        self._static_mask = None
+
+        # Ball numbers are blitted from pre-rasterised digit masks
+        self._digit_glyphs, self._digit_ascent = self._build_digit_glyphs()
+
+        # Keyboard dispatch: key code -> handler(frame); False stops the test
+        self._key_handlers = {
+            ord("a"): self._toggle_aruco,
+            ord("b"): self._toggle_balls,
+            ord("t"): self._toggle_table,
+            ord("s"): self._save_frame,
+            ord("q"): self._request_quit,
+            27: self._request_quit,  # ESC
+        }
+
+    def _toggle_aruco(self, frame):
+        self.show_aruco = not self.show_aruco
+        print(f"ArUco display: {'ON' if self.show_aruco else 'OFF'}")
+
+    def _toggle_balls(self, frame):
+        self.show_balls = not self.show_balls
+        print(f"Ball display: {'ON' if self.show_balls else 'OFF'}")
+
+    def _toggle_table(self, frame):
+        self.show_table_mask = not self.show_table_mask
+        print(f"Table mask: {'ON' if self.show_table_mask else 'OFF'}")
+
+    def _save_frame(self, frame):
+        timestamp = int(time.time())
+        filename = f"camera_test_{self.camera_id}_{timestamp}.jpg"
+        cv2.imwrite(filename, frame)
+        print(f"💾 Frame saved as {filename}")
+
+    def _request_quit(self, frame):
+        return False
+
+    def _init_aruco(self):
+        """Resolve the ArUco detection API once (fails loudly if missing)"""
+        from cv2 import aruco
+
+        aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
+        if hasattr(aruco, "ArucoDetector"):
+            # OpenCV >= 4.7
+            self._aruco_params = self._tune_aruco(aruco, aruco.DetectorParameters())
+            detector = aruco.ArucoDetector(aruco_dict, self._aruco_params)
+            return detector.detectMarkers
+
+        # Legacy module-level API
+        self._aruco_params = self._tune_aruco(aruco, aruco.DetectorParameters_create())
+
+        def detect(gray):
+            return aruco.detectMarkers(gray, aruco_dict, parameters=self._aruco_params)
+
+        return detect
+
+    def _tune_aruco(self, aruco, params):
+        """Apply the `aruco:` config section to detector parameters"""
+        aruco_cfg = self.cfg.get("aruco", {})
+
+        refinement = aruco_cfg.get("corner_refinement")
+        if refinement is not None:
+            params.cornerRefinementMethod = getattr(
+                aruco, f"CORNER_REFINE_{str(refinement).upper()}"
+            )
+        for key, attr in ARUCO_PARAM_KEYS.items():
+            if key in aruco_cfg:
+                setattr(params, attr, aruco_cfg[key])
+        return params
+
+    def _buffers(self, frame):
+        """Preallocated work buffers for host frames (none for UMat frames)"""
+        if not isinstance(frame, np.ndarray):
+            return {}
+        h, w = frame.shape[:2]
+        if self._work_shape != (h, w):
+            small = ((h + 1) // 2, (w + 1) // 2)
+            self._work = {
+                "hsv": np.empty((h, w, 3), np.uint8),
+                "mask": np.empty((h, w), np.uint8),
+                "mask_tmp": np.empty((h, w), np.uint8),
+                "gray": np.empty((h, w), np.uint8),
+                "gray_small": np.empty(small, np.uint8),
+                "blur": np.empty(small if self._hough_downscale else (h, w), np.uint8),
+            }
+            self._work_shape = (h, w)
+        return self._work
+
     def detect_aruco_markers(self, frame):
         """Detect ArUco markers"""
-        try:
-            import cv2.aruco as aruco
-
-            aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-            try:
-                parameters = aruco.DetectorParameters()
-                detector = aruco.ArucoDetector(aruco_dict, parameters)
-                corners, ids, _ = detector.detectMarkers(gray)
-            except (AttributeError, TypeError):
-                return None, None
-
-            return corners, ids
-
-        except Exception as e:
-            print(f"ArUco error: {e}")
-            return None, None
+        buf = self._buffers(frame)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buf.get("gray"))
+        if isinstance(gray, cv2.UMat):
+            gray = gray.get()
+        corners, ids, _ = self._detect_markers(gray)
+        return corners, ids
 
     def detect_table_area(self, frame):
         """Detect green table area"""
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        # Green range from config
-        detection_cfg = self.cfg.get("detection", {})
-        green_lower = np.array(detection_cfg.get("hsv_green_lower", [35, 30, 30]))
-        green_upper = np.array(detection_cfg.get("hsv_green_upper", [85, 255, 255]))
+        buf = self._buffers(frame)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=buf.get("hsv"))
 
-        mask = cv2.inRange(hsv, green_lower, green_upper)
+        mask = cv2.inRange(hsv, self._green_lo, self._green_hi, dst=buf.get("mask"))
 
         # Clean up mask
-        kernel = np.ones((5, 5), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        tmp = cv2.morphologyEx(
+            mask, cv2.MORPH_CLOSE, self._morph_kernel, dst=buf.get("mask_tmp")
+        )
+        mask = cv2.morphologyEx(
+            tmp, cv2.MORPH_OPEN, self._morph_kernel, dst=buf.get("mask")
+        )
+
+        # Keep the (cached) mask on the host for contour analysis and drawing
+        if isinstance(mask, cv2.UMat):
+            mask = mask.get()
 
         return mask
 
+    def cached_table_area(self, frame, src=None):
+        """Return the table mask, recomputing it only when it may be stale"""
+        brightness = float(frame[::32, ::32].mean())
+        changed = (
+            self._prev_brightness is not None
+            and abs(brightness - self._prev_brightness) > 5
+        )
+        if (
+            self._cached_mask is None
+            or changed
+            or self._mask_frame_age >= self._mask_period
+        ):
+            self._cached_mask = self.detect_table_area(frame if src is None else src)
+            self._mask_frame_age = 0
+            self._prev_brightness = brightness
+        else:
+            self._mask_frame_age += 1
+        return self._cached_mask
+
     def detect_balls(self, frame, table_mask=None):
         """Detect balls using HoughCircles"""
+        buf = self._buffers(frame)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buf.get("gray"))
         if table_mask is not None:
-            # Apply table mask
-            frame_masked = cv2.bitwise_and(frame, frame, mask=table_mask)
-            gray = cv2.cvtColor(frame_masked, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # Apply the 0/255 table mask in place on the gray image
+            gray = cv2.bitwise_and(gray, table_mask, dst=gray)
 
-        # HoughCircles parameters from config
-        detection_cfg = self.cfg.get("detection", {})
+        scale = 1
+        if self._hough_downscale:
+            gray = cv2.pyrDown(gray, dst=buf.get("gray_small"))
+            scale = 2
+        gray = cv2.GaussianBlur(gray, (5, 5), 0, dst=buf.get("blur"))
 
         circles = cv2.HoughCircles(
             gray,
             cv2.HOUGH_GRADIENT,
-            dp=detection_cfg.get("hough_dp", 1.2),
-            minDist=detection_cfg.get("hough_min_dist", 16),
-            param1=detection_cfg.get("hough_param1", 120),
-            param2=detection_cfg.get("hough_param2", 18),
-            minRadius=detection_cfg.get("ball_min_radius", 8),
-            maxRadius=detection_cfg.get("ball_max_radius", 18),
+            dp=self._hough_dp,
+            minDist=max(1, self._hough_min_dist // scale),
+            param1=self._hough_param1,
+            param2=self._hough_param2,
+            minRadius=self._ball_min_radius // scale,
+            maxRadius=self._ball_max_radius // scale,
         )
 
+        if isinstance(circles, cv2.UMat):
+            circles = circles.get()
+
         detections = []
-        if circles is not None:
-            circles = np.round(circles[0, :]).astype(int)
+        if circles is not None and circles.size > 0:
+            circles = np.round(circles[0, :] * scale).astype(int)
             for x, y, r in circles:
                 detections.append((x, y, r))
 
         return detections
 
-    def draw_info(self, frame, corners, ids, balls, table_mask, fps):
-        """Draw all detection information"""
-        h, w = frame.shape[:2]
+    def _build_static_overlay(self, h, w):
+        """Render the text that never changes (title, controls) once"""
+        overlay = np.zeros((h, w, 3), np.uint8)
 
         # Title
         cv2.putText(
-            frame,
+            overlay,
             f"PoolMind Camera Test (Cam {self.camera_id})",
             (10, 30),
             cv2.FONT_HERSHEY_SIMPLEX,
@@ -148,6 +314,75 @@ class CameraTest:
             2,
         )
 
+        # Controls
+        controls = [
+            "Controls:",
+            "A - Toggle ArUco",
+            "B - Toggle Balls",
+            "T - Toggle Table",
+            "S - Save frame",
+            "Q - Quit",
+        ]
+
+        for i, control in enumerate(controls):
+            cv2.putText(
+                overlay,
+                control,
+                (10, h - 120 + i * 20),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.4,
+                (200, 200, 200),
+                1,
+            )
+
+        self._static_overlay = overlay
+        self._static_mask = cv2.cvtColor(overlay, cv2.COLOR_BGR2GRAY) > 0
+
+    def _build_digit_glyphs(self, scale=0.4, thickness=1):
+        """Rasterise digits 0-9 once into boolean glyph masks"""
+        glyphs = []
+        ascent = 0
+        for d in range(10):
+            (gw, gh), baseline = cv2.getTextSize(
+                str(d), cv2.FONT_HERSHEY_SIMPLEX, scale, thickness
+            )
+            img = np.zeros((gh + baseline, gw), np.uint8)
+            cv2.putText(
+                img,
+                str(d),
+                (0, gh),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                scale,
+                255,
+                thickness,
+            )
+            glyphs.append(img > 0)
+            ascent = max(ascent, gh)
+        return glyphs, ascent
+
+    def _blit_number(self, frame, number, x, y, color):
+        """Draw a non-negative integer with its baseline-left corner at (x, y)"""
+        h, w = frame.shape[:2]
+        top = y - self._digit_ascent
+        for ch in str(number):
+            glyph = self._digit_glyphs[ord(ch) - 48]
+            gh, gw = glyph.shape
+            y0, y1 = max(top, 0), min(top + gh, h)
+            x0, x1 = max(x, 0), min(x + gw, w)
+            if y0 < y1 and x0 < x1:
+                mask = glyph[y0 - top : y1 - top, x0 - x : x1 - x]
+                frame[y0:y1, x0:x1][mask] = color
+            x += gw
+
+    def draw_info(self, frame, corners, ids, balls, table_mask, fps):
+        """Draw all detection information"""
+        h, w = frame.shape[:2]
+
+        # Static title/controls: composite the cached rendering
+        if self._static_overlay is None or self._static_overlay.shape[:2] != (h, w):
+            self._build_static_overlay(h, w)
+        np.copyto(frame, self._static_overlay, where=self._static_mask[..., None])
+
         # Detection status
         y_pos = 70
 
@@ -200,26 +435,19 @@ class CameraTest:
             for i, (x, y, r) in enumerate(balls):
                 cv2.circle(frame, (x, y), r, (0, 255, 255), 2)
                 cv2.circle(frame, (x, y), 2, (0, 255, 255), -1)
-                cv2.putText(
-                    frame,
-                    str(i + 1),
-                    (x - 5, y + 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.4,
-                    (0, 255, 255),
-                    1,
-                )
+                self._blit_number(frame, i + 1, x - 5, y + 5, (0, 255, 255))
 
         y_pos += 30
 
         # Table detection
         if table_mask is not None:
-            contours, _ = cv2.findContours(
-                table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+            num, _, stats, _ = cv2.connectedComponentsWithStats(
+                table_mask, 8, cv2.CV_32S
             )
-            if contours:
-                largest_contour = max(contours, key=cv2.contourArea)
-                area = cv2.contourArea(largest_contour)
+            if num > 1:
+                # Label 0 is the background; pick the largest foreground blob
+                largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+                area = stats[largest, cv2.CC_STAT_AREA]
                 cv2.putText(
                     frame,
                     f"Table Area: {int(area)}",
@@ -255,27 +483,6 @@ class CameraTest:
             1,
         )
 
-        # Controls
-        controls = [
-            "Controls:",
-            "A - Toggle ArUco",
-            "B - Toggle Balls",
-            "T - Toggle Table",
-            "S - Save frame",
-            "Q - Quit",
-        ]
-
-        for i, control in enumerate(controls):
-            cv2.putText(
-                frame,
-                control,
-                (10, h - 120 + i * 20),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.4,
-                (200, 200, 200),
-                1,
-            )
-
         # Detection modes status
         modes = [
             f"ArUco: {'ON' if self.show_aruco else 'OFF'}",
@@ -295,15 +502,70 @@ class CameraTest:
                 1,
             )
 
+    def _capture_loop(self):
+        """Producer: read frames and publish the latest one"""
+        while not self._stop.is_set():
+            ret, f = self.cap.read()
+            if not ret:
+                self._capture_failed = True
+                break
+            with self._frame_lock:
+                self._latest_frame = f
+
+    def _next_frame(self):
+        """Take the latest captured frame, waiting until one is available"""
+        while True:
+            with self._frame_lock:
+                frame = self._latest_frame
+                self._latest_frame = None
+            if frame is not None:
+                return frame
+            if self._capture_failed:
+                return None
+            time.sleep(0.001)
+
+    def _compile_pipeline(self):
+        """Build the per-frame detection function for the current setup
+
+        Stage callables are bound once as closure locals and the OpenCL
+        branch is resolved here rather than on every frame.
+        """
+        detect_aruco = self.detect_aruco_markers
+        table_area = self.cached_table_area
+        detect_balls = self.detect_balls
+
+        if self._use_opencl:
+            to_device = cv2.UMat
+
+            def process(frame):
+                src = to_device(frame)
+                corners, ids = detect_aruco(src)
+                table_mask = table_area(frame, src)
+                return corners, ids, table_mask, detect_balls(src, table_mask)
+
+        else:
+
+            def process(frame):
+                corners, ids = detect_aruco(frame)
+                table_mask = table_area(frame)
+                return corners, ids, table_mask, detect_balls(frame, table_mask)
+
+        return process
+
     def run_test(self):
         """Run camera test"""
         print("🚀 Starting Camera Test...")
         print("🎮 Controls: A=ArUco, B=Balls, T=Table, S=Save, Q=Quit")
 
+        process_frame = self._compile_pipeline()
+
+        capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        capture_thread.start()
+
         try:
             while True:
-                ret, frame = self.cap.read()
-                if not ret:
+                frame = self._next_frame()
+                if frame is None:
                     print("❌ Failed to read frame")
                     break
 
@@ -316,9 +578,7 @@ class CameraTest:
                 fps = len(self.fps_counter)
 
                 # Computer vision pipeline
-                corners, ids = self.detect_aruco_markers(frame)
-                table_mask = self.detect_table_area(frame)
-                balls = self.detect_balls(frame, table_mask)
+                corners, ids, table_mask, balls = process_frame(frame)
 
                 # Draw results
                 self.draw_info(frame, corners, ids, balls, table_mask, fps)
@@ -329,22 +589,9 @@ class CameraTest:
                 # Handle keyboard input
                 key = cv2.waitKey(1) & 0xFF
 
-                if key == ord("q") or key == 27:
+                handler = self._key_handlers.get(key)
+                if handler is not None and handler(frame) is False:
                     break
-                elif key == ord("a"):
-                    self.show_aruco = not self.show_aruco
-                    print(f"ArUco display: {'ON' if self.show_aruco else 'OFF'}")
-                elif key == ord("b"):
-                    self.show_balls = not self.show_balls
-                    print(f"Ball display: {'ON' if self.show_balls else 'OFF'}")
-                elif key == ord("t"):
-                    self.show_table_mask = not self.show_table_mask
-                    print(f"Table mask: {'ON' if self.show_table_mask else 'OFF'}")
-                elif key == ord("s"):
-                    timestamp = int(time.time())
-                    filename = f"camera_test_{self.camera_id}_{timestamp}.jpg"
-                    cv2.imwrite(filename, frame)
-                    print(f"💾 Frame saved as {filename}")
 
                 self.frame_count += 1
 
@@ -352,6 +599,8 @@ class CameraTest:
             print("\n🛑 Test interrupted by user")
 
         finally:
+            self._stop.set()
+            capture_thread.join(timeout=1.0)
             self.cap.release()
             cv2.destroyAllWindows()
             print("🎯 Camera test finished!")
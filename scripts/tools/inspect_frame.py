@@ -61,25 +61,33 @@ def inspect_virtual_frame():
         ),  # 3: bottom-left
     ]
 
-    # Extract and save marker regions
-    for i, (x, y) in enumerate(positions):
-        # Adjust positions to frame bounds
-        x = max(0, min(x, frame.shape[1] - virtual_table.marker_size))
-        y = max(0, min(y, frame.shape[0] - virtual_table.marker_size))
+    # Clamp marker boxes to the frame bounds once
+    size = virtual_table.marker_size
+    clamped = [
+        (
+            max(0, min(x, frame.shape[1] - size)),
+            max(0, min(y, frame.shape[0] - size)),
+        )
+        for x, y in positions
+    ]
+
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
+    detector_params = cv2.aruco.DetectorParameters()
+    detector = cv2.aruco.ArucoDetector(aruco_dict, detector_params)
 
-        # Extract marker region
-        marker_region = frame[y : y + 120, x : x + 120]
+    # Extract marker regions and convert each to grayscale exactly once
+    regions = []
+    grays = []
+    for i, (x, y) in enumerate(clamped):
+        marker_region = frame[y : y + size, x : x + size]
+        gray_region = cv2.cvtColor(marker_region, cv2.COLOR_BGR2GRAY)
+        regions.append(marker_region)
+        grays.append(gray_region)
 
         print(f"\nMarker {i} at ({x},{y}):")
         print(f"  Region shape: {marker_region.shape}")
         print(f"  Region min/max: {marker_region.min()}/{marker_region.max()}")
         print(f"  Mean values: {marker_region.mean(axis=(0,1))}")
-
-        # Save region
-        cv2.imwrite(f"marker_region_{i}.jpg", marker_region)
-
-        # Convert to grayscale and check
-        gray_region = cv2.cvtColor(marker_region, cv2.COLOR_BGR2GRAY)
         print(f"  Gray min/max: {gray_region.min()}/{gray_region.max()}")
 
         # Check for binary pattern (ArUco should have black/white)
@@ -88,21 +96,10 @@ def inspect_virtual_frame():
             f"  Unique gray values: {len(unique_values)} (should be ~2 for good ArUco)"
         )
 
-        cv2.imwrite(f"marker_region_{i}_gray.jpg", gray_region)
-
-    # Test ArUco detection on individual regions
+    # Test ArUco detection on each raw region: padding or tiling them would
+    # add surroundings the real markers may lack, hiding missing quiet zones
     print("\n=== Testing ArUco Detection on Regions ===")
-    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_50)
-    detector_params = cv2.aruco.DetectorParameters()
-    detector = cv2.aruco.ArucoDetector(aruco_dict, detector_params)
-
-    for i, (x, y) in enumerate(positions):
-        x = max(0, min(x, frame.shape[1] - virtual_table.marker_size))
-        y = max(0, min(y, frame.shape[0] - virtual_table.marker_size))
-
-        marker_region = frame[y : y + 120, x : x + 120]
-        gray_region = cv2.cvtColor(marker_region, cv2.COLOR_BGR2GRAY)
-
+    for i, gray_region in enumerate(grays):
         _, ids, _ = detector.detectMarkers(gray_region)
 
         if ids is not None:
@@ -110,6 +107,11 @@ def inspect_virtual_frame():
         else:
             print(f"  Marker {i}: ❌ Not detected")
 
+    # Save regions
+    for i, (marker_region, gray_region) in enumerate(zip(regions, grays)):
+        cv2.imwrite(f"marker_region_{i}.jpg", marker_region)
+        cv2.imwrite(f"marker_region_{i}_gray.jpg", gray_region)
+
     print("\n💾 Saved individual marker regions as marker_region_*.jpg")
 
 
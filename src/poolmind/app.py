@@ -1,8 +1,10 @@
 import argparse
+import queue
+import threading
 import time
+from collections import deque
 
 import cv2
-import yaml
 
 from .calib.markers import MarkerHomography
 from .capture.camera import Camera
@@ -12,6 +14,7 @@ from .services.replay import ReplayRecorder
 from .table.geometry import TableGeometry
 from .track.tracker import CentroidTracker
 from .ui.overlay import Overlay
+from .util.cfg import load_config
 from .web.hub import FrameHub
 
 
@@ -21,10 +24,108 @@ def parse_args():
     return ap.parse_args()
 
 
+def _serial_frames(cap, calib, table, detector, tracker):
+    """Run capture, calibration, detection and tracking one frame at a time"""
+    for frame in cap.frames():
+        H, H_inv, dbg_mrk = calib.homography_from_frame(frame)
+        warped = table.warp(frame, H) if H is not None else None
+        if warped is not None:
+            xyr, labels = detector.detect_arrays(warped)  # (N, 3) cx, cy, radius
+            tracks = tracker.update(xyr, labels)  # dict: id -> (cx, cy, radius)
+        else:
+            tracks = {}
+        yield frame, H, H_inv, warped, dbg_mrk, tracks
+
+
+def _put_latest(q, item):
+    """Put item on q, dropping the oldest entry if q is full"""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+def _pipelined_frames(cap, calib, table, detector, tracker, queue_size=2):
+    """Same output as _serial_frames, but overlapped across threads.
+
+    Stage 1 (capture + calibration) and stage 2 (warp + detection + tracking)
+    run in worker threads; the caller's thread is stage 3 (engine, overlay,
+    display), since HighGUI calls must stay on the main thread. Stage 1 drops
+    the oldest frame when stage 2 falls behind. The warped image is the
+    TableGeometry buffer and is only valid until stage 2 warps the next frame.
+    """
+    calibrated = queue.Queue(maxsize=queue_size)
+    tracked = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put_until_stopped(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def calibrate():
+        try:
+            for frame in cap.frames():
+                if stop.is_set():
+                    break
+                # frames() recycles its buffer once the next frame is pulled,
+                # so hand the next stage a copy
+                frame = frame.copy()
+                H, H_inv, dbg_mrk = calib.homography_from_frame(frame)
+                _put_latest(calibrated, (frame, H, H_inv, dbg_mrk))
+        finally:
+            put_until_stopped(calibrated, None)
+
+    def track():
+        try:
+            while not stop.is_set():
+                try:
+                    item = calibrated.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                frame, H, H_inv, dbg_mrk = item
+                warped = table.warp(frame, H) if H is not None else None
+                if warped is not None:
+                    tracks = tracker.update(*detector.detect_arrays(warped))
+                else:
+                    tracks = {}
+                # The tracker keeps updating its own dict for the next frame,
+                # so stage 3 gets a snapshot
+                put_until_stopped(
+                    tracked, (frame, H, H_inv, warped, dbg_mrk, dict(tracks))
+                )
+        finally:
+            put_until_stopped(tracked, None)
+
+    workers = [
+        threading.Thread(target=calibrate, daemon=True),
+        threading.Thread(target=track, daemon=True),
+    ]
+    for t in workers:
+        t.start()
+    try:
+        while True:
+            item = tracked.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        stop.set()
+
+
 def main():
     args = parse_args()
-    with open(args.config, "r") as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_config(args.config)
 
     cam_cfg = cfg["camera"]
     cap = Camera(
@@ -44,18 +145,25 @@ def main():
     hub = FrameHub()
 
     win = "PoolMind"
-    cv2.namedWindow(win, cv2.WINDOW_NORMAL)
+    # OpenGL windows upload frames as GL textures; needs OpenCV built WITH_OPENGL
+    use_gl = cfg["ui"].get("opengl", False)
+    if use_gl:
+        try:
+            cv2.namedWindow(win, cv2.WINDOW_NORMAL | cv2.WINDOW_OPENGL)
+        except cv2.error:
+            use_gl = False
+    if not use_gl:
+        cv2.namedWindow(win, cv2.WINDOW_NORMAL)
     if cfg["ui"].get("fullscreen", True):
         cv2.setWindowProperty(win, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
 
-    prev = time.time()
+    # Timestamps of the last 30 frames; FPS is averaged over that window
+    frame_ts = deque(maxlen=30)
     fps = 0.0
 
     # Start web server (FastAPI) in background if enabled
     web_cfg = cfg.get("web", {})
     if web_cfg.get("enabled", True):
-        import threading
-
         from .web import server as webserver
 
         webserver.hub = hub
@@ -72,21 +180,19 @@ def main():
 
         threading.Thread(target=run_web, daemon=True).start()
 
-    for frame in cap.frames():
-        now = time.time()
-        dt = now - prev
-        prev = now
-        fps = 0.9 * fps + 0.1 * (1.0 / dt) if dt > 0 else fps
-
-        H, H_inv, dbg_mrk = calib.homography_from_frame(frame)
-        warped = table.warp(frame, H) if H is not None else None
+    pipe_cfg = cfg.get("pipeline", {})
+    if pipe_cfg.get("threaded", False):
+        frames = _pipelined_frames(
+            cap, calib, table, detector, tracker, pipe_cfg.get("queue_size", 2)
+        )
+    else:
+        frames = _serial_frames(cap, calib, table, detector, tracker)
 
-        balls = []
-        if warped is not None:
-            balls = detector.detect(warped)  # list of (cx, cy, radius)
-            tracks = tracker.update(balls)  # dict: id -> (cx, cy, radius)
-        else:
-            tracks = {}
+    for frame, H, H_inv, warped, dbg_mrk, tracks in frames:
+        now = time.perf_counter_ns()
+        frame_ts.append(now)
+        if len(frame_ts) > 1:
+            fps = (len(frame_ts) - 1) * 1e9 / max(1, now - frame_ts[0])
 
         # Update game engine
         engine.update(tracks)
@@ -103,11 +209,12 @@ def main():
 
         replay.process_frame(frame)
 
-        cv2.imshow(win, out)
+        cv2.imshow(win, cv2.UMat(out) if use_gl else out)
         key = cv2.waitKey(1) & 0xFF
         if key == 27:  # ESC
             break
 
+    frames.close()
     cap.release()
     cv2.destroyAllWindows()
 
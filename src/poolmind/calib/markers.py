@@ -15,8 +15,17 @@ class MarkerHomography:
         self.table_w = cfg.get("table_w", 2000)
         self.table_h = cfg.get("table_h", 1000)
         self.alpha = cfg.get("ema_alpha", 0.2)
+        # Markers are searched on a frame downscaled by this factor first
+        self.detect_scale = cfg.get("detect_scale", 0.5)
+        self._corner_ids_arr = np.asarray(self.corner_ids, dtype=np.int32)
+        # id -> marker center lookup table (NaN = not seen this frame); the
+        # 4x4_50 dictionary only produces ids below 50
+        n_ids = max([50] + [i + 1 for i in self.corner_ids])
+        self._id_centers = np.full((n_ids, 2), np.nan, dtype=np.float32)
         self.H = None
         self.H_inv = None
+        # Scratch buffer for normalising the previous H in _ema_H
+        self._norm_scratch = np.empty((3, 3), dtype=np.float64)
         if _ARUCO_AVAILABLE:
             self.dict = aruco.getPredefinedDictionary(aruco.DICT_4X4_50)
             # Handle both old and new OpenCV ArUco API
@@ -48,36 +57,52 @@ class MarkerHomography:
 
             # Use appropriate API based on what's available
             if hasattr(self, "_use_new_api") and self._use_new_api:
-                corners, ids, _ = self.detector.detectMarkers(gray)
+                corners, ids = self._detect_markers(gray)
             else:
                 # Fallback - return None if old API not available
                 return None, None, None
 
             if ids is not None and len(ids) >= 4:
-                # map id -> center
-                id_to_center = {}
-                for cs, i in zip(corners, ids.flatten()):
-                    c = cs[0]
-                    cx = c[:, 0].mean()
-                    cy = c[:, 1].mean()
-                    id_to_center[int(i)] = (cx, cy)
-
-                if all(i in id_to_center for i in self.corner_ids):
-                    src_pts = np.array(
-                        [id_to_center[i] for i in self.corner_ids], dtype=np.float32
-                    )
+                # (N, 4, 2) corners -> (N, 2) centers in one vectorized mean
+                id_centers = self._id_centers
+                id_centers.fill(np.nan)
+                id_centers[ids.ravel()] = (
+                    np.concatenate(corners).reshape(-1, 4, 2).mean(axis=1)
+                )
+                src_pts = id_centers[self._corner_ids_arr]
+                if not np.isnan(src_pts).any():
                     H = cv2.getPerspectiveTransform(src_pts, self._dst_pts)
-                    if self.H is None:
-                        self.H = H
-                    else:
-                        self.H = self._ema_H(self.H, H, self.alpha)
-                    self.H_inv = np.linalg.inv(self.H)
-                    dbg = (corners, ids)
+                    # cv2.invert skips the LAPACK dispatch of np.linalg.inv; it
+                    # returns 0 for the singular H that collinear or
+                    # misdetected markers give, which must not reach the EMA
+                    ok, H_inv = cv2.invert(H, flags=cv2.DECOMP_LU)
+                    if ok and self.H is not None:
+                        H = self._ema_H(self.H, H, self.alpha)
+                        ok, H_inv = cv2.invert(H, flags=cv2.DECOMP_LU)
+                    if ok:
+                        self.H, self.H_inv = H, H_inv
+                        dbg = (corners, ids)
         return self.H, self.H_inv, dbg
 
+    def _detect_markers(self, gray):
+        """Detect markers on a downscaled frame, retrying at full resolution
+        if any corner marker was missed"""
+        s = self.detect_scale
+        if s < 1.0:
+            small = cv2.resize(gray, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+            corners, ids, _ = self.detector.detectMarkers(small)
+            if ids is not None and np.isin(self._corner_ids_arr, ids).all():
+                # Map pixel centers back to full-resolution coordinates
+                k = 1.0 / s
+                corners = tuple((c + 0.5) * k - 0.5 for c in corners)
+                return corners, ids
+        corners, ids, _ = self.detector.detectMarkers(gray)
+        return corners, ids
+
     def _ema_H(self, H_prev, H_new, alpha):
         # Exponential moving average in parameter space by normalizing H
-        Hp = H_prev / H_prev[2, 2]
-        Hn = H_new / H_new[2, 2]
-        Hs = (1.0 - alpha) * Hp + alpha * Hn
+        Hp = np.divide(H_prev, H_prev[2, 2], out=self._norm_scratch)
+        Hp *= 1.0 - alpha
+        Hs = np.multiply(H_new, alpha / H_new[2, 2], dtype=np.float64)
+        Hs += Hp
         return Hs
@@ -12,7 +12,13 @@ class Camera:
         self.cap.set(cv2.CAP_PROP_FPS, fps)
 
         self.lock = threading.Lock()
-        self.frame = None
+        self.frame = None  # latest complete frame
+        self._seq = 0  # bumped whenever a new frame is published
+        # Triple buffering: the capture thread decodes into _back while
+        # frames() hands out _held, so only buffers in _free are recycled
+        self._back = None
+        self._held = None
+        self._free = []
         self.stopped = False
 
         self.thread = threading.Thread(target=self._loop, daemon=True)
@@ -20,18 +26,37 @@ class Camera:
 
     def _loop(self):
         while not self.stopped:
-            ok, f = self.cap.read()
+            ok, f = self.cap.read(self._back)
             if ok:
                 with self.lock:
-                    self.frame = f
+                    prev, self.frame = self.frame, f
+                    self._seq += 1
+                    if prev is not None and prev is not self._held:
+                        self._free.append(prev)
+                    self._back = self._free.pop() if self._free else None
             else:
                 time.sleep(0.005)
 
     def frames(self):
+        """Yield each new frame once, as a read-only view of the capture buffer.
+
+        Nothing is copied: the buffer is handed back to the capture thread when
+        the next frame is requested, so copy a frame to keep it longer. Only
+        one generator should consume a camera at a time.
+        """
+        seen = 0
         while not self.stopped:
             with self.lock:
-                f = None if self.frame is None else self.frame.copy()
+                if self._seq != seen and self.frame is not None:
+                    seen = self._seq
+                    prev, self._held = self._held, self.frame
+                    if prev is not None and prev is not self._held:
+                        self._free.append(prev)
+                    f = self._held.view()
+                else:
+                    f = None
             if f is not None:
+                f.flags.writeable = False
                 yield f
             else:
                 time.sleep(0.005)
@@ -1,21 +1,75 @@
+import math
+
 import cv2
 import numpy as np
 
+# Default HSV ranges per ball class for colour-segmentation detection.
+# A class may list several ranges (e.g. red wraps around hue 0/180).
+DEFAULT_BALL_COLORS = {
+    "cue": [[[0, 0, 200], [180, 50, 255]]],
+    "solid": [[[0, 100, 100], [30, 255, 255]], [[150, 100, 100], [180, 255, 255]]],
+    "stripe": [[[90, 100, 100], [150, 255, 255]]],
+    "eight": [[[0, 0, 0], [180, 255, 50]]],
+}
+
 
 class BallDetector:
     def __init__(self, cfg):
+        self.method = cfg.get("method", "hough")
         self.hough_dp = cfg.get("hough_dp", 1.2)
         self.hough_min_dist = cfg.get("hough_min_dist", 16)
         self.hough_param1 = cfg.get("hough_param1", 120)
         self.hough_param2 = cfg.get("hough_param2", 18)
         self.ball_min_radius = cfg.get("ball_min_radius", 8)
         self.ball_max_radius = cfg.get("ball_max_radius", 18)
+        # Skip HoughCircles when no block of the coarse table image varies
+        # more than this: a scalar or a 4x8 per-block list from
+        # calibrate_empty(); None disables the gate
+        empty_var = cfg.get("empty_table_var")
+        self.empty_table_var = (
+            None if empty_var is None else np.asarray(empty_var, dtype=np.float32)
+        )
+
+        # Colour segmentation: (N, 2, 3) array of HSV [low, high] bounds and
+        # the ball class each range belongs to
+        ball_colors = cfg.get("ball_colors", DEFAULT_BALL_COLORS)
+        self.color_classes = list(ball_colors)
+        self.color_range_class = []
+        ranges = []
+        for idx, name in enumerate(self.color_classes):
+            for lo, hi in ball_colors[name]:
+                ranges.append((lo, hi))
+                self.color_range_class.append(idx)
+        self.color_bounds = np.array(ranges, dtype=np.uint8).reshape(-1, 2, 3)
+        self._open_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._min_area = math.pi * self.ball_min_radius**2
+        self._max_area = math.pi * self.ball_max_radius**2
+        # Work buffers for the Hough path, (re)allocated to the frame size
+        self._gray = None
+        self._blur = None
 
     def detect(self, warped_bgr):
-        gray = cv2.cvtColor(warped_bgr, cv2.COLOR_BGR2GRAY)
-        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        """Detect balls as a list of (x, y, r, color_type) tuples"""
+        xyr, labels = self.detect_arrays(warped_bgr)
+        return [(x, y, r, label) for (x, y, r), label in zip(xyr.tolist(), labels)]
+
+    def detect_arrays(self, warped_bgr):
+        """Detect balls as an (N, 3) int32 array of x, y, r and a list of the
+        N color types, ready for CentroidTracker.update(xyr, labels)"""
+        if self.method == "color":
+            return self._detect_by_color(warped_bgr)
+
+        if self._gray is None or self._gray.shape != warped_bgr.shape[:2]:
+            self._gray = np.empty(warped_bgr.shape[:2], dtype=np.uint8)
+            self._blur = np.empty_like(self._gray)
+        gray = cv2.cvtColor(warped_bgr, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        blur = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._blur)
+        if self.empty_table_var is not None and not np.any(
+            self._block_var(blur) > self.empty_table_var
+        ):
+            return np.empty((0, 3), dtype=np.int32), []
         circles = cv2.HoughCircles(
-            gray,
+            blur,
             cv2.HOUGH_GRADIENT,
             dp=self.hough_dp,
             minDist=self.hough_min_dist,
@@ -24,15 +78,68 @@ class BallDetector:
             minRadius=self.ball_min_radius,
             maxRadius=self.ball_max_radius,
         )
-        balls = []
-        if circles is not None:
-            for x, y, r in np.round(circles[0, :]).astype("int"):
-                # Basic color classification (could be enhanced later)
-                color_type = self._classify_ball_color(
-                    warped_bgr, int(x), int(y), int(r)
-                )
-                balls.append((int(x), int(y), int(r), color_type))
-        return balls
+        if circles is None:
+            return np.empty((0, 3), dtype=np.int32), []
+        xyr = np.round(circles[0, :, :3]).astype(np.int32)
+        circles = xyr.tolist()
+        # Basic color classification (could be enhanced later). Only the
+        # small center samples are converted to HSV: a full-frame
+        # conversion of the warped table costs far more than all of them
+        # together. Batching only pays off beyond a full rack of candidates.
+        if len(circles) > 16:
+            labels = self._classify_ball_colors(warped_bgr, circles)
+        else:
+            labels = [
+                self._classify_ball_color(warped_bgr, x, y, r) for x, y, r in circles
+            ]
+        return xyr, labels
+
+    @staticmethod
+    def _block_var(gray):
+        """Intensity variance of each 8x8 block of a 64x32 area-averaged
+        thumbnail, as a (4, 8) array"""
+        small = cv2.resize(gray, (64, 32), interpolation=cv2.INTER_AREA)
+        return small.reshape(4, 8, 8, 8).var(axis=(1, 3), dtype=np.float32)
+
+    def calibrate_empty(self, warped_bgr, margin=1.5, floor=2.0):
+        """Set the empty-table gate from a snapshot of the table without balls.
+
+        Returns the per-block thresholds as nested lists, ready to be stored as
+        detection.empty_table_var.
+        """
+        gray = cv2.cvtColor(warped_bgr, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        self.empty_table_var = self._block_var(gray) * margin + floor
+        return self.empty_table_var.round(1).tolist()
+
+    def _detect_by_color(self, warped_bgr):
+        """Find balls as HSV colour blobs; the mask that matched gives the class"""
+        hsv = cv2.cvtColor(warped_bgr, cv2.COLOR_BGR2HSV)
+
+        masks = [None] * len(self.color_classes)
+        for (lo, hi), idx in zip(self.color_bounds, self.color_range_class):
+            m = cv2.inRange(hsv, lo, hi)
+            masks[idx] = m if masks[idx] is None else cv2.bitwise_or(masks[idx], m)
+
+        found, labels = [], []
+        for name, mask in zip(self.color_classes, masks):
+            if mask is None:
+                continue
+            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self._open_kernel)
+            num, _, stats, centroids = cv2.connectedComponentsWithStats(
+                mask, 8, cv2.CV_32S
+            )
+            # Label 0 is the background
+            areas = stats[1:num, cv2.CC_STAT_AREA]
+            keep = (areas >= self._min_area) & (areas <= self._max_area)
+            if not keep.any():
+                continue
+            radii = np.sqrt(areas[keep] / math.pi)
+            found.append(np.column_stack((centroids[1:num][keep], radii)))
+            labels += [name] * len(radii)
+        if not found:
+            return np.empty((0, 3), dtype=np.int32), []
+        return np.round(np.concatenate(found)).astype(np.int32), labels
 
     def _classify_ball_color(self, img, cx, cy, radius):
         """Simple color classification - sample HSV in center region of ball"""
@@ -47,7 +154,36 @@ class BallDetector:
 
         hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
         mean_h, mean_s, mean_v = cv2.mean(hsv)[:3]
+        return self._label_from_hsv(mean_h, mean_s, mean_v)
+
+    def _classify_ball_colors(self, img, circles):
+        """Classify all (x, y, r) circles with a single HSV conversion of their
+        center samples, then per-ball means via np.add.reduceat"""
+        h, w = img.shape[:2]
+        patches = []
+        for cx, cy, radius in circles:
+            sample_r = max(3, radius // 3)
+            y1, y2 = max(0, cy - sample_r), min(h, cy + sample_r)
+            x1, x2 = max(0, cx - sample_r), min(w, cx + sample_r)
+            patches.append(img[y1:y2, x1:x2].reshape(-1, 3))
+
+        labels = ["unknown"] * len(patches)
+        sizes = np.array([len(p) for p in patches], dtype=np.int64)
+        filled = np.flatnonzero(sizes)
+        if filled.size == 0:
+            return labels
+
+        pixels = np.concatenate(patches)[:, None, :]
+        hsv = cv2.cvtColor(pixels, cv2.COLOR_BGR2HSV)[:, 0, :]
+        starts = np.cumsum(sizes) - sizes
+        sums = np.add.reduceat(hsv, starts[filled], axis=0, dtype=np.int64)
+        means = sums / sizes[filled, None]
+        for i, (mean_h, mean_s, mean_v) in zip(filled, means.tolist()):
+            labels[i] = self._label_from_hsv(mean_h, mean_s, mean_v)
+        return labels
 
+    @staticmethod
+    def _label_from_hsv(mean_h, mean_s, mean_v):
         # Simple heuristic classification
         if mean_v > 200 and mean_s < 50:  # High brightness, low saturation
             return "cue"  # likely white cue ball
@@ -1,25 +1,25 @@
-import math
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from .rules import EightBallRules
 
 
-def dist(a, b):
-    return math.hypot(a[0] - b[0], a[1] - b[1])
-
-
 class GameEngine:
     def __init__(self, table, cfg=None):
         self.table = table
         cfg = cfg or {}
         self.max_disappeared_for_pot = cfg.get("disappear_for_pot", 6)
         self.pocket_radius = cfg.get("pocket_radius", 36)
-        self.track_history = {}  # id -> list of (x,y)
+        self.track_history = {}  # id -> deque of the last 120 (x,y)
         self.disappear_counts = {}  # id -> frames disappeared
         self.potted_ids = set()
         self.events = []  # recent events (type, info)
         self.score = defaultdict(int)
+        # ball type -> its score key, filled in for other types on first pot
+        self._potted_keys = {
+            t: f"{t}_potted" for t in ("cue", "solid", "stripe", "eight", "unknown")
+        }
         self.ball_types = {}  # id -> color type
+        self._active_by_type = defaultdict(int)  # color type -> unpotted tracks
         self.last_shot_potted = set()  # balls potted in current shot
         self.shot_in_progress = False
 
@@ -28,6 +28,22 @@ class GameEngine:
         self.enable_8ball_rules = cfg.get("enable_8ball_rules", True)
 
         self.pockets = table.default_pockets(self.pocket_radius)
+        self._build_pocket_grid()
+
+    def _build_pocket_grid(self):
+        """Bucket pockets into a uniform grid with cells as wide as the largest
+        pocket's capture radius, so a position only needs checking against the
+        pockets listed for its own cell"""
+        self._pocket_cell = max((pr * 1.2 for _, _, pr in self.pockets), default=1.0)
+        self._pocket_grid = defaultdict(list)
+        for idx, (px, py, _) in enumerate(self.pockets):
+            cx, cy = int(px // self._pocket_cell), int(py // self._pocket_cell)
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    self._pocket_grid[gx, gy].append(idx)
+        self._pocket_grid = dict(self._pocket_grid)
+        # (x, y, squared capture radius) per pocket for sqrt-free checks
+        self._pocket_r2 = [(px, py, (pr * 1.2) ** 2) for px, py, pr in self.pockets]
 
     def update(self, tracks):
         # Update histories & detect disappearances
@@ -42,15 +58,22 @@ class GameEngine:
         # Update positions and ball types
         for oid, track_data in tracks.items():
             # Handle both old (x,y,r) and new (x,y,r,color) formats
+            is_new = oid not in self.track_history
             if len(track_data) >= 4:
                 x, y, _, color = track_data
+                old_color = self.ball_types.get(oid, "unknown")
                 self.ball_types[oid] = color
+                if color != old_color and not is_new and oid not in self.potted_ids:
+                    self._active_by_type[old_color] -= 1
+                    self._active_by_type[color] += 1
             else:
                 x, y, _ = track_data[0], track_data[1], track_data[2]
 
-            self.track_history.setdefault(oid, [])
+            if is_new:
+                self.track_history[oid] = deque(maxlen=120)
+                if oid not in self.potted_ids:
+                    self._active_by_type[self.ball_types.get(oid, "unknown")] += 1
             self.track_history[oid].append((x, y))
-            self.track_history[oid] = self.track_history[oid][-120:]
             self.disappear_counts[oid] = 0
 
         # mark disappeared
@@ -65,10 +88,13 @@ class GameEngine:
                         self.last_shot_potted.add(oid)
                         new_pots_this_frame.add(oid)
                         ball_type = self.ball_types.get(oid, "unknown")
+                        potted_key = self._potted_keys.get(ball_type)
+                        if potted_key is None:
+                            potted_key = f"{ball_type}_potted"
+                            self._potted_keys[ball_type] = potted_key
+                        self._active_by_type[ball_type] -= 1
                         self.score["potted"] += 1
-                        self.score[f"{ball_type}_potted"] = (
-                            self.score.get(f"{ball_type}_potted", 0) + 1
-                        )
+                        self.score[potted_key] += 1
 
                         self.events.append(
                             {
@@ -118,30 +144,33 @@ class GameEngine:
         hist = self.track_history.get(oid, [])
         if not hist:
             return False
-        last = hist[-1]
-        for px, py, pr in self.pockets:
-            if dist(last, (px, py)) <= pr * 1.2:
+        x, y = hist[-1]
+        cell = (int(x // self._pocket_cell), int(y // self._pocket_cell))
+        for idx in self._pocket_grid.get(cell, ()):
+            px, py, r2 = self._pocket_r2[idx]
+            dx, dy = x - px, y - py
+            if dx * dx + dy * dy <= r2:
                 return True
         return False
 
-    def get_state(self):
-        active_by_type = defaultdict(int)
+    def _recount_active(self):
+        """Rebuild the per-type counts of unpotted tracks from scratch"""
+        self._active_by_type.clear()
         for oid in self.track_history:
             if oid not in self.potted_ids:
-                ball_type = self.ball_types.get(oid, "unknown")
-                active_by_type[ball_type] += 1
+                self._active_by_type[self.ball_types.get(oid, "unknown")] += 1
 
+    def get_state(self):
+        active_by_type = self._active_by_type
         base_state = {
             "potted": self.score.get("potted", 0),
             "cue_potted": self.score.get("cue_potted", 0),
             "solid_potted": self.score.get("solid_potted", 0),
             "stripe_potted": self.score.get("stripe_potted", 0),
-            "active_balls": len(
-                [i for i in self.track_history if i not in self.potted_ids]
-            ),
-            "active_cue": active_by_type["cue"],
-            "active_solid": active_by_type["solid"],
-            "active_stripe": active_by_type["stripe"],
+            "active_balls": sum(active_by_type.values()),
+            "active_cue": active_by_type.get("cue", 0),
+            "active_solid": active_by_type.get("solid", 0),
+            "active_stripe": active_by_type.get("stripe", 0),
             "total_tracked": len(self.track_history),
         }
 
@@ -155,6 +184,7 @@ class GameEngine:
     def reset_game(self):
         """Reset game state"""
         self.potted_ids.clear()
+        self._recount_active()
         self.last_shot_potted.clear()
         self.shot_in_progress = False
         self.score.clear()
@@ -25,6 +25,16 @@ class GameState(Enum):
 class EightBallRules:
     """8-Ball pool game rules implementation"""
 
+    _STR_TO_BALL = {ball_type.value: ball_type for ball_type in BallType}
+    # Shot handler per game state; GAME_OVER has none
+    _STATE_HANDLERS = {
+        GameState.BREAK: "_handle_break",
+        GameState.OPEN_TABLE: "_handle_open_table",
+        GameState.SOLID_PLAYER: "_handle_normal_shot",
+        GameState.STRIPE_PLAYER: "_handle_normal_shot",
+        GameState.EIGHT_BALL: "_handle_eight_ball_shot",
+    }
+
     def __init__(self):
         self.state = GameState.BREAK
         self.current_player = 1
@@ -61,29 +71,19 @@ class EightBallRules:
         """
         events: list[Dict[str, Any]] = []
 
-        # Convert string types to enum
+        # Convert string types to enum, dropping unknown types
+        to_ball = self._STR_TO_BALL
         typed_balls = {}
         for ball_id in potted_balls:
-            ball_type_str = ball_types.get(ball_id, "unknown")
-            if ball_type_str == "cue":
-                typed_balls[ball_id] = BallType.CUE
-            elif ball_type_str == "solid":
-                typed_balls[ball_id] = BallType.SOLID
-            elif ball_type_str == "stripe":
-                typed_balls[ball_id] = BallType.STRIPE
-            elif ball_type_str == "eight":
-                typed_balls[ball_id] = BallType.EIGHT
+            ball_type = to_ball.get(ball_types.get(ball_id))
+            if ball_type is not None:
+                typed_balls[ball_id] = ball_type
 
         self.scratched = cue_potted
 
-        if self.state == GameState.BREAK:
-            return self._handle_break(typed_balls, events)
-        elif self.state == GameState.OPEN_TABLE:
-            return self._handle_open_table(typed_balls, events)
-        elif self.state in [GameState.SOLID_PLAYER, GameState.STRIPE_PLAYER]:
-            return self._handle_normal_shot(typed_balls, events)
-        elif self.state == GameState.EIGHT_BALL:
-            return self._handle_eight_ball_shot(typed_balls, events)
+        handler = self._STATE_HANDLERS.get(self.state)
+        if handler is not None:
+            return getattr(self, handler)(typed_balls, events)
 
         return {
             "events": events,
@@ -24,7 +24,21 @@ class ReplayRecorder:
     def process_frame(self, frame_bgr):
         if not self.enabled:
             return
-        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        if self.cooldown > 0:
+            # Skip frames entirely while cooling down; the last gray frame is
+            # stale by the end, so start over from the next one
+            self.cooldown -= 1
+            if self.cooldown == 0:
+                self.prev_gray = None
+            return
+        # The motion score is a mean over the frame, so every 4th pixel in each
+        # direction estimates it just as well; nearest-neighbour sampling keeps
+        # the score on the same scale as diff_threshold, unlike area averaging
+        h, w = frame_bgr.shape[:2]
+        small = cv2.resize(
+            frame_bgr, (max(1, w // 4), max(1, h // 4)), interpolation=cv2.INTER_NEAREST
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
         if self.prev_gray is None:
             self.prev_gray = gray
             return
@@ -32,10 +46,6 @@ class ReplayRecorder:
         self.prev_gray = gray
         score = diff.mean()
 
-        if self.cooldown > 0:
-            self.cooldown -= 1
-            return
-
         if score > self.threshold:
             # record short clip via ffmpeg from V4L2 (best-effort)
             ts = time.strftime("%Y%m%d-%H%M%S")
@@ -7,17 +7,33 @@ class TableGeometry:
         self.w = cfg.get("table_w", 2000)
         self.h = cfg.get("table_h", 1000)
         self.margin = cfg.get("margin", 30)
+        self._warped = None
 
     def warp(self, frame, H):
-        return cv2.warpPerspective(frame, H, (self.w, self.h))
+        """Warp frame into canonical table space.
+
+        The result is written into a buffer owned by this instance and is
+        overwritten by the next call.
+        """
+        shape = (self.h, self.w) + frame.shape[2:]
+        if (
+            self._warped is None
+            or self._warped.shape != shape
+            or self._warped.dtype != frame.dtype
+        ):
+            self._warped = np.empty(shape, dtype=frame.dtype)
+        return cv2.warpPerspective(
+            frame, H, (self.w, self.h), dst=self._warped, flags=cv2.INTER_LINEAR
+        )
 
     def back_project_points(self, pts, H_inv):
         if H_inv is None or len(pts) == 0:
             return []
-        pts_h = np.hstack([pts, np.ones((len(pts), 1))])
-        prj = (H_inv @ pts_h.T).T
-        prj = prj[:, :2] / prj[:, [2]]
-        return prj
+        # Homogeneous product without building the (N, 3) [x, y, 1] array
+        prj = np.asarray(pts, dtype=np.float64) @ H_inv[:, :2].T
+        prj += H_inv[:, 2]
+        prj[:, :2] /= prj[:, 2:]
+        return prj[:, :2]
 
     def default_pockets(self, r):
         # 6 pockets: 4 corners + 2 middles on longer rails, in canonical space
@@ -2,6 +2,11 @@ from collections import OrderedDict
 
 import numpy as np
 
+try:
+    from scipy.optimize import linear_sum_assignment  # optimal matching
+except ImportError:
+    linear_sum_assignment = None
+
 
 class CentroidTracker:
     def __init__(self, cfg):
@@ -10,78 +15,140 @@ class CentroidTracker:
         self.disappeared = OrderedDict()  # id -> count
         self.maxDisappeared = cfg.get("max_disappeared", 8)
         self.maxDistance = cfg.get("max_distance", 40)
-
-    def update(self, detections):
-        # detections: list of (x,y,r) or (x,y,r,color_type)
+        # Centroids of self.objects as an (N, 2) array, row i belonging to
+        # self._ids[i]; both follow the insertion order of self.objects
+        self._ids = []
+        self._xy = np.empty((0, 2), dtype=np.float64)
+
+    def update(self, detections, labels=None):
+        # detections: list of (x,y,r) or (x,y,r,color_type), or an (N, 3)
+        # array of x, y, r with the color types in labels
         if len(detections) == 0:
             # mark disappeared
             to_delete = []
-            for objectID in list(self.disappeared.keys()):
+            for row, objectID in enumerate(self._ids):
                 self.disappeared[objectID] += 1
                 if self.disappeared[objectID] > self.maxDisappeared:
-                    to_delete.append(objectID)
-            for oid in to_delete:
-                self.objects.pop(oid, None)
-                self.disappeared.pop(oid, None)
+                    to_delete.append(row)
+            self._drop_rows(to_delete)
             return self.objects
 
-        # Normalize detections to handle both (x,y,r) and (x,y,r,color) formats
-        normalized_detections = []
-        for det in detections:
-            if len(det) >= 4:  # has color info
-                x, y, r, color = det[0], det[1], det[2], det[3]
-            else:  # old format
-                x, y, r, color = det[0], det[1], det[2], "unknown"
-            normalized_detections.append((x, y, r, color))
+        if isinstance(detections, np.ndarray):
+            if labels is None:
+                labels = ["unknown"] * len(detections)
+            normalized_detections = [
+                (x, y, r, color)
+                for (x, y, r), color in zip(detections[:, :3].tolist(), labels)
+            ]
+            inputCentroids = detections[:, :2]
+        else:
+            # Normalize detections to handle both (x,y,r) and (x,y,r,color)
+            normalized_detections = []
+            for det in detections:
+                if len(det) >= 4:  # has color info
+                    x, y, r, color = det[0], det[1], det[2], det[3]
+                else:  # old format
+                    x, y, r, color = det[0], det[1], det[2], "unknown"
+                normalized_detections.append((x, y, r, color))
+            inputCentroids = None
+
+        if inputCentroids is None:
+            inputCentroids = np.array(
+                [(x, y) for (x, y, _, _) in normalized_detections]
+            )
 
         if len(self.objects) == 0:
             for x, y, r, color in normalized_detections:
                 self.objects[self.nextObjectID] = (x, y, r, color)
                 self.disappeared[self.nextObjectID] = 0
+                self._ids.append(self.nextObjectID)
                 self.nextObjectID += 1
+            self._xy = inputCentroids.astype(np.float64)
             return self.objects
 
-        objectIDs = list(self.objects.keys())
-        objectCentroids = np.array([(v[0], v[1]) for v in self.objects.values()])
-        inputCentroids = np.array([(x, y) for (x, y, _, _) in normalized_detections])
-
-        D = self._dist_matrix(objectCentroids, inputCentroids)
+        objectIDs = self._ids
+        D = self._dist_matrix(self._xy, inputCentroids)
 
-        rows = D.min(axis=1).argsort()
-        cols = D.argmin(axis=1)[rows]
+        rows, cols = self._match(D)
 
-        usedRows = set()
-        usedCols = set()
-
-        for row, col in zip(rows, cols):
-            if row in usedRows or col in usedCols:
-                continue
-            if D[row, col] > self.maxDistance:
-                continue
+        for row, col in zip(rows.tolist(), cols.tolist()):
             objectID = objectIDs[row]
             x, y, r, color = normalized_detections[col]
             self.objects[objectID] = (int(x), int(y), int(r), color)
             self.disappeared[objectID] = 0
-            usedRows.add(row)
-            usedCols.add(col)
+        self._xy[rows] = np.trunc(inputCentroids[cols])
 
-        unusedRows = set(range(0, D.shape[0])).difference(usedRows)
-        unusedCols = set(range(0, D.shape[1])).difference(usedCols)
+        unusedRows = np.ones(D.shape[0], dtype=bool)
+        unusedRows[rows] = False
+        unusedCols = np.ones(D.shape[1], dtype=bool)
+        unusedCols[cols] = False
+        unusedRows = np.flatnonzero(unusedRows).tolist()
+        unusedCols = np.flatnonzero(unusedCols)
 
+        to_delete = []
         for row in unusedRows:
             objectID = objectIDs[row]
             self.disappeared[objectID] += 1
             if self.disappeared[objectID] > self.maxDisappeared:
-                self.objects.pop(objectID, None)
-                self.disappeared.pop(objectID, None)
+                to_delete.append(row)
+        self._drop_rows(to_delete)
 
-        for col in unusedCols:
+        for col in unusedCols.tolist():
             x, y, r, color = normalized_detections[col]
             self.objects[self.nextObjectID] = (int(x), int(y), int(r), color)
             self.disappeared[self.nextObjectID] = 0
+            self._ids.append(self.nextObjectID)
             self.nextObjectID += 1
+        if len(unusedCols):
+            self._xy = np.concatenate((self._xy, np.trunc(inputCentroids[unusedCols])))
 
         return self.objects
 
+    def _drop_rows(self, rows):
+        """Forget the objects at the given rows of self._ids / self._xy"""
+        if not rows:
+            return
+        for row in rows:
+            objectID = self._ids[row]
+            self.objects.pop(objectID, None)
+            self.disappeared.pop(objectID, None)
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[rows] = False
+        self._xy = self._xy[keep]
+        self._ids = [oid for oid, k in zip(self._ids, keep.tolist()) if k]
+
+    def _match(self, D):
+        """Pair object rows with detection columns of the distance matrix D.
+
+        Returns (rows, cols) index arrays of the pairs within maxDistance. Uses
+        the Hungarian algorithm when scipy is installed, otherwise greedily
+        gives each object, closest first, its nearest free detection.
+        """
+        if linear_sum_assignment is not None:
+            # Out-of-range pairs cost more than any set of valid ones, so they
+            # are only chosen when nothing else is left
+            rows, cols = linear_sum_assignment(np.where(D > self.maxDistance, 1e9, D))
+            keep = D[rows, cols] <= self.maxDistance
+            return rows[keep], cols[keep]
+
+        order = D.min(axis=1).argsort()
+        nearest = D.argmin(axis=1)[order]
+        rows, cols = [], []
+        usedCols = set()
+        for row, col in zip(order.tolist(), nearest.tolist()):
+            if col in usedCols or D[row, col] > self.maxDistance:
+                continue
+            usedCols.add(col)
+            rows.append(row)
+            cols.append(col)
+        return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
     def _dist_matrix(self, A, B):
-        return np.sqrt(((A[:, None, :] - B[None, :, :]) ** 2).sum(axis=2))
+        # Per-axis outer differences squared in place: only (n, m) temporaries,
+        # never the (n, m, 2) difference cube
+        dx = np.subtract.outer(A[:, 0], B[:, 0]).astype(np.float64, copy=False)
+        dy = np.subtract.outer(A[:, 1], B[:, 1]).astype(np.float64, copy=False)
+        dx *= dx
+        dy *= dy
+        dx += dy
+        return np.sqrt(dx, out=dx)
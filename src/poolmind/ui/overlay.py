@@ -1,6 +1,16 @@
+from collections import deque
+
 import cv2
 import numpy as np
 
+# Overlay BGR color per ball type; other types are drawn as "unknown"
+BALL_COLORS_BGR = {
+    "cue": (255, 255, 255),  # White
+    "solid": (0, 255, 0),  # Green
+    "stripe": (255, 0, 0),  # Blue
+    "unknown": (0, 255, 255),  # Yellow
+}
+
 
 class Overlay:
     def __init__(self, cfg, table):
@@ -8,28 +18,36 @@ class Overlay:
         self.draw_ids = cfg.get("draw_ids", True)
         self.draw_trails = cfg.get("draw_trails", True)
         self.table = table
-        self.trails = {}
+        self.trails = {}  # id -> deque of the last 60 (x,y)
+        # Output buffers used in turn: the frame returned last time may still
+        # be held (e.g. by the web hub) while the next one is drawn
+        self._out_bufs = [None, None]
+        self._out_idx = 0
+        self._pocket_pts = None  # canonical pocket centers, (N, 2) float32
 
     def draw(self, frame_bgr, warped_bgr, H_inv, tracks, fps, dbg_markers):
-        out = frame_bgr.copy()
+        """Draw the overlay on a copy of frame_bgr and return it.
+
+        The copy lives in one of two reused buffers, so the returned frame is
+        only valid until the call after next.
+        """
+        self._out_idx ^= 1
+        out = self._out_bufs[self._out_idx]
+        if out is None or out.shape != frame_bgr.shape or out.dtype != frame_bgr.dtype:
+            out = self._out_bufs[self._out_idx] = np.empty_like(frame_bgr)
+        np.copyto(out, frame_bgr)
 
         # draw marker diagnostics
         if dbg_markers is not None:
             corners, ids = dbg_markers
             cv2.aruco.drawDetectedMarkers(out, corners, ids)
 
-        # draw tracks in warped space then back-project
-        for oid, track_data in tracks.items():
-            # Handle both old (x,y,r) and new (x,y,r,color) formats
-            if len(track_data) >= 4:
-                x, y, _, color = track_data
-            else:
-                x, y, _, color = track_data[0], track_data[1], track_data[2], "unknown"
-
-            if self.draw_trails:
-                self.trails.setdefault(oid, [])
-                self.trails[oid].append((x, y))
-                self.trails[oid] = self.trails[oid][-60:]
+        # record trails in warped space, then back-project the tracks
+        if self.draw_trails:
+            for oid, track_data in tracks.items():
+                if oid not in self.trails:
+                    self.trails[oid] = deque(maxlen=60)
+                self.trails[oid].append((track_data[0], track_data[1]))
 
         # back project centers to original frame
         centers = np.array(
@@ -39,15 +57,14 @@ class Overlay:
         back_pts = (
             self.table.back_project_points(centers, H_inv) if len(centers) > 0 else []
         )
+        back_pts = np.asarray(back_pts).astype(np.int32).tolist()
 
         for i, (oid, track_data) in enumerate(tracks.items()):
-            if len(track_data) >= 4:
-                x, y, _, color = track_data
-            else:
-                x, y, _, color = track_data[0], track_data[1], track_data[2], "unknown"
+            # Handle both old (x,y,r) and new (x,y,r,color) formats
+            color = track_data[3] if len(track_data) >= 4 else "unknown"
 
             if len(back_pts) > i:
-                bx, by = map(int, back_pts[i])
+                bx, by = back_pts[i]
 
                 # Color-coded circles
                 circle_color = self._get_ball_color(color)
@@ -85,29 +102,22 @@ class Overlay:
 
     def _get_ball_color(self, color_type):
         """Return BGR color for different ball types"""
-        color_map = {
-            "cue": (255, 255, 255),  # White
-            "solid": (0, 255, 0),  # Green
-            "stripe": (255, 0, 0),  # Blue
-            "unknown": (0, 255, 255),  # Yellow
-        }
-        return color_map.get(color_type, (0, 255, 255))
+        return BALL_COLORS_BGR.get(color_type, BALL_COLORS_BGR["unknown"])
 
     def draw_pockets(self, out, h_matrix=None):
         # draw pocket hints by projecting canonical pocket centers to original frame
         if h_matrix is None:
             return
 
-        pockets = self.table.default_pockets(20)
-        if len(pockets) == 0:
-            return
-
-        pts = np.array([[x, y] for (x, y, _) in pockets], dtype=np.float32)
-        if len(pts) == 0:
+        # Pockets are fixed for the table, so their centers are built once
+        if self._pocket_pts is None:
+            pockets = self.table.default_pockets(20)
+            self._pocket_pts = np.array(
+                [[x, y] for (x, y, _) in pockets], dtype=np.float32
+            ).reshape(-1, 2)
+        if len(self._pocket_pts) == 0:
             return
 
-        pts_h = np.hstack([pts, np.ones((len(pts), 1))])
-        prj = (h_matrix @ pts_h.T).T
-        prj = prj[:, :2] / prj[:, [2]]
-        for x, y in prj.astype(int):
+        prj = self.table.back_project_points(self._pocket_pts, h_matrix)
+        for x, y in np.asarray(prj).astype(np.int32).tolist():
             cv2.circle(out, (x, y), 10, (0, 120, 255), 2)
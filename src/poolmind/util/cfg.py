@@ -0,0 +1,25 @@
+import os
+from functools import lru_cache
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _SafeLoader  # LibYAML C parser
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+
+@lru_cache(maxsize=8)
+def _load_cached(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=_SafeLoader)
+
+
+def load_config(path):
+    """Load a YAML config file, re-parsing only when the file has changed.
+
+    The returned dict is shared between callers and must be treated as
+    read-only.
+    """
+    st = os.stat(path)
+    return _load_cached(os.path.abspath(path), st.st_mtime_ns, st.st_size)
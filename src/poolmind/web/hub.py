@@ -1,3 +1,4 @@
+import json
 import threading
 import time
 from collections import deque
@@ -5,6 +6,37 @@ from collections import deque
 import cv2
 import numpy as np
 
+try:  # optional, faster JSON encoding of the published state
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from turbojpeg import TJPF_BGR, TJSAMP_420, TurboJPEG  # libjpeg-turbo
+except ImportError:
+    TurboJPEG = TJPF_BGR = TJSAMP_420 = None
+
+
+def _load_turbojpeg():
+    """TurboJPEG encoder, or None when PyTurboJPEG or libturbojpeg is missing"""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError):  # shared library not found
+        return None
+
+
+def _dumps(obj):
+    """JSON bytes of obj, rendered as the web server's JSON responses are"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
 
 class FrameHub:
     def __init__(self, max_events=200):
@@ -12,40 +44,111 @@ class FrameHub:
         self.frame_bgr = None  # latest original frame with overlay
         self.state = {}  # dict of stats
         self.events = deque(maxlen=max_events)
+        self.frame_seq = 0  # bumped for every published frame
+        self._jpeg_cache = {}  # quality -> JPEG bytes of the current frame
+        self._state_json = (None, b"")  # (state dict, its JSON bytes)
+        self._tj = _load_turbojpeg()
+        self._listeners = []  # called with no arguments after each new frame
+
+    def add_listener(self, callback):
+        """Call callback() from the producer thread whenever a frame lands"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
 
     def update_frame(self, frame_bgr, state=None):
         with self.lock:
             self.frame_bgr = frame_bgr
+            self.frame_seq += 1
+            self._jpeg_cache.clear()
             if state is not None:
                 self.state = state
+        for callback in list(self._listeners):
+            callback()
 
     def push_event(self, ev):
-        with self.lock:
-            ev = dict(ev)
-            ev["ts"] = time.time()
-            self.events.append(ev)
+        # No lock: deque.append is atomic and maxlen drops the oldest event
+        ev = dict(ev)
+        ev["ts"] = time.time()
+        self.events.append(ev)
 
     def get_jpeg(self, quality=80):
-        with self.lock:
-            if self.frame_bgr is None:
-                return None
-            ok, buf = cv2.imencode(
-                ".jpg", self.frame_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        """JPEG bytes of the latest frame, encoded once per frame and quality
+        however many clients poll it"""
+        for _ in range(3):
+            with self.lock:
+                frame_bgr, seq = self.frame_bgr, self.frame_seq
+                if frame_bgr is None:
+                    return None
+                cached = self._jpeg_cache.get(quality)
+                if cached is not None:
+                    return cached
+            # Encode outside the lock so update_frame never waits on a client
+            jpeg = self._encode(frame_bgr, quality)
+            with self.lock:
+                if self.frame_seq == seq:
+                    if jpeg is not None:
+                        self._jpeg_cache[quality] = jpeg
+                    return jpeg
+            # A newer frame landed mid-encode, and the producer may already be
+            # drawing the next one into the buffer just encoded; start over
+        return jpeg
+
+    def _encode(self, frame_bgr, quality):
+        if self._tj is not None:
+            # Same 4:2:0 chroma subsampling as cv2.imencode's default
+            return self._tj.encode(
+                np.ascontiguousarray(frame_bgr),
+                quality=quality,
+                pixel_format=TJPF_BGR,
+                jpeg_subsample=TJSAMP_420,
             )
-            if not ok:
-                return None
-            # Handle both numpy array and bytes (for testing compatibility)
-            if hasattr(buf, "tobytes"):
-                return buf.tobytes()
-            elif isinstance(buf, np.ndarray):
-                return buf.astype(np.uint8).tobytes()
-            else:
-                return bytes(buf)
+        ok, buf = cv2.imencode(
+            ".jpg", frame_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        )
+        if not ok:
+            return None
+        # Handle both numpy array and bytes (for testing compatibility)
+        if hasattr(buf, "tobytes"):
+            return buf.tobytes()
+        elif isinstance(buf, np.ndarray):
+            return buf.astype(np.uint8).tobytes()
+        return bytes(buf)
+
+    def get_state_json(self):
+        """JSON bytes of the latest state, encoded once per published state
+        however many clients poll it"""
+        state = self.state
+        cached_state, body = self._state_json
+        if cached_state is not state:
+            # No lock: update_frame replaces the state dict rather than
+            # mutating it, and the pair is swapped in whole, so a reader
+            # racing an update at worst encodes the same state twice
+            body = _dumps(state)
+            self._state_json = (state, body)
+        return body
 
     def snapshot(self):
-        with self.lock:
-            return (
-                None if self.frame_bgr is None else self.frame_bgr.copy(),
-                dict(self.state),
-                list(self.events),
-            )
+        """(frame, state, events) as published last.
+
+        The frame is a read-only view, not a copy: the producer may reuse its
+        buffer a couple of frames later, so copy it to keep it longer.
+        """
+        # No lock: the web handlers call this on the event loop, which must
+        # not wait on the producer. Both attributes are replaced, never
+        # mutated, and update_frame stores the frame before the state, so
+        # reading the state first can at worst pair it with the next frame,
+        # never with an older one.
+        state = dict(self.state)
+        frame_bgr = self.frame_bgr
+        frame = None
+        if frame_bgr is not None:
+            frame = frame_bgr.view()
+            frame.flags.writeable = False
+        # Copying the deque runs in C without releasing the GIL, so a
+        # concurrent push_event cannot interleave with it
+        return frame, state, list(self.events)
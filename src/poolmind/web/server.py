@@ -1,14 +1,32 @@
 import asyncio
+import hashlib
+import heapq
 import os
 import time
+from email.utils import formatdate, parsedate_to_datetime
 from typing import Optional
 
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-app = FastAPI(title="PoolMind", description="Real-time Pool Vision System")
+try:  # optional, faster JSON rendering (and numpy values serialize as-is)
+    import orjson  # noqa: F401
+except ImportError:
+    from fastapi.responses import JSONResponse
+else:
+    from fastapi.responses import ORJSONResponse as JSONResponse
+
+app = FastAPI(
+    title="PoolMind",
+    description="Real-time Pool Vision System",
+    default_response_class=JSONResponse,
+)
+# JSON and metrics bodies compress several times over; level 6 instead of
+# the default 9 keeps the CPU cost low on a Raspberry Pi
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=6)
 hub = None  # injected
 
 # Get the directory of this file to properly resolve paths
@@ -28,6 +46,105 @@ if os.path.exists(templates_dir):
 # Templates configuration completed above
 
 
+def _placeholder_jpeg(name, text, org):
+    """JPEG bytes of a bundled placeholder image, shown without a camera.
+
+    Without the static directory, the same black 640x480 frame with a white
+    message is drawn and encoded instead.
+    """
+    path = os.path.join(static_dir, name)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    import cv2
+    import numpy as np
+
+    img = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(img, text, org, cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+_PART_HEAD = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+
+
+def _mjpeg_part(buf):
+    """One multipart/x-mixed-replace part of the MJPEG stream"""
+    # A single join copies the JPEG once; chained + copies it for every piece
+    return b"".join((_PART_HEAD, b"%d\r\n\r\n" % len(buf), buf, b"\r\n"))
+
+
+# GZipMiddleware leaves alone responses that declare a Content-Encoding. JPEG
+# and PDF bodies are compressed already, and gzipping the MJPEG stream would
+# also hold parts back in the compressor.
+_IDENTITY = {"Content-Encoding": "identity"}
+
+# Frames must reach the viewer as they are sent: no caching, and no
+# response buffering by a reverse proxy such as nginx in front of the server
+_STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **_IDENTITY}
+
+# The placeholders are black 640x480 frames with a white message, shipped as
+# files so that serving them needs neither OpenCV nor numpy
+_NO_CAMERA_JPEG = _placeholder_jpeg("no_camera.jpg", "No camera", (250, 240))
+_NO_CAMERA_PART = _mjpeg_part(
+    _placeholder_jpeg("camera_not_available.jpg", "Camera not available", (200, 240))
+)
+
+# Fixed JSON bodies, rendered once exactly as JSONResponse would render them
+_DEFAULT_STATE_JSON = JSONResponse(
+    {
+        "cue_balls": 0,
+        "solid_balls": 0,
+        "stripe_balls": 0,
+        "total_balls": 0,
+        "game_state": "waiting",
+        "current_player": 1,
+        "total_tracked": 0,
+        "active_balls": 0,
+        "potted": 0,
+        "active_cue": 0,
+        "active_solid": 0,
+        "active_stripe": 0,
+        "cue_potted": 0,
+        "solid_potted": 0,
+        "stripe_potted": 0,
+    }
+).body
+_CONFIG_JSON = JSONResponse(
+    {
+        "camera": {"width": 1280, "height": 720, "fps": 30},
+        "detection": {"method": "HoughCircles"},
+        "calibration": {"markers": "ArUco 4x4_50"},
+        "web": {"version": "1.0"},
+    }
+).body
+_CONFIG_ETAG = '"%s"' % hashlib.blake2b(_CONFIG_JSON, digest_size=8).hexdigest()
+_NO_CAMERA_ETAG = '"no-camera"'
+# Frame ETags carry the process start time so a restarted server, whose hub
+# counts frames from zero again, never matches a tag cached by a browser
+_FRAME_ETAG_PREFIX = "%x" % time.time_ns()
+
+
+def _etag_matches(request, etag):
+    """Whether the client already holds the representation tagged etag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(
+        tag.strip().removeprefix("W/") in (etag, "*") for tag in header.split(",")
+    )
+
+
+def _not_modified_since(request, mtime):
+    """Whether the client's If-Modified-Since copy is at least as new as mtime"""
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     if templates:
@@ -52,77 +169,50 @@ async def index(request: Request):
 @app.get("/stream.mjpg")
 async def stream():
     async def gen():
-        boundary = "frame"
-        placeholder_text = "Camera not available"
-        while True:
-            if hub is not None:
-                buf = hub.get_jpeg(quality=75)
-                if buf is not None:
-                    yield (
-                        b"--" + boundary.encode() + b"\r\n"
-                        b"Content-Type: image/jpeg\r\n"
-                        b"Content-Length: "
-                        + str(len(buf)).encode()
-                        + b"\r\n\r\n"
-                        + buf
-                        + b"\r\n"
-                    )
-                else:
-                    # Create simple placeholder image if hub returns None
-                    import cv2
-                    import numpy as np
-
-                    img = np.zeros((480, 640, 3), dtype=np.uint8)
-                    cv2.putText(
-                        img,
-                        placeholder_text,
-                        (200, 240),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        1,
-                        (255, 255, 255),
-                        2,
-                    )
-                    _, buf = cv2.imencode(".jpg", img)
-                    buf = buf.tobytes()
-                    yield (
-                        b"--" + boundary.encode() + b"\r\n"
-                        b"Content-Type: image/jpeg\r\n"
-                        b"Content-Length: "
-                        + str(len(buf)).encode()
-                        + b"\r\n\r\n"
-                        + buf
-                        + b"\r\n"
-                    )
-            else:
-                # Create simple placeholder image if no hub
-                import cv2
-                import numpy as np
-
-                img = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(
-                    img,
-                    placeholder_text,
-                    (200, 240),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (255, 255, 255),
-                    2,
-                )
-                _, buf = cv2.imencode(".jpg", img)
-                buf = buf.tobytes()
-                yield (
-                    b"--" + boundary.encode() + b"\r\n"
-                    b"Content-Type: image/jpeg\r\n"
-                    b"Content-Length: "
-                    + str(len(buf)).encode()
-                    + b"\r\n\r\n"
-                    + buf
-                    + b"\r\n"
-                )
-            await asyncio.sleep(0.1)
+        loop = asyncio.get_running_loop()
+        new_frame = asyncio.Event()
+
+        def notify():
+            # Runs on the capture thread; the event belongs to this loop
+            try:
+                loop.call_soon_threadsafe(new_frame.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+        listening = None
+        try:
+            while True:
+                if hub is not listening:  # the hub may be injected later
+                    if listening is not None:
+                        listening.remove_listener(notify)
+                    if hub is not None:
+                        hub.add_listener(notify)
+                    listening = hub
+                if hub is None:
+                    yield _NO_CAMERA_PART
+                    await asyncio.sleep(0.1)
+                    continue
+
+                # Encoding is CPU work, keep it off the event loop
+                buf = await loop.run_in_executor(None, hub.get_jpeg, 75)
+                yield _NO_CAMERA_PART if buf is None else _mjpeg_part(buf)
+
+                # Send each new frame as it lands; frames published while
+                # this client was busy collapse into the latest one. Resend
+                # after a second without frames to keep the stream alive.
+                try:
+                    await asyncio.wait_for(new_frame.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                new_frame.clear()
+        finally:
+            if listening is not None:
+                listening.remove_listener(notify)
 
     return StreamingResponse(
-        gen(), media_type="multipart/x-mixed-replace; boundary=frame"
+        gen(),
+        media_type="multipart/x-mixed-replace; boundary=frame",
+        headers=_STREAM_HEADERS,
     )
 
 
@@ -130,48 +220,35 @@ async def stream():
 async def state():
     if hub is not None:
         try:
-            snapshot_result = hub.snapshot()
-            if snapshot_result and len(snapshot_result) >= 2:
-                _, s, _ = snapshot_result
-                return JSONResponse(s or {})
+            # Encoded by the hub once per frame, not once per poll
+            body = hub.get_state_json()
+            return Response(content=body, media_type="application/json")
         except Exception:
             pass
 
     # Return default state when no camera available or error
-    return JSONResponse(
-        {
-            "cue_balls": 0,
-            "solid_balls": 0,
-            "stripe_balls": 0,
-            "total_balls": 0,
-            "game_state": "waiting",
-            "current_player": 1,
-            "total_tracked": 0,
-            "active_balls": 0,
-            "potted": 0,
-            "active_cue": 0,
-            "active_solid": 0,
-            "active_stripe": 0,
-            "cue_potted": 0,
-            "solid_potted": 0,
-            "stripe_potted": 0,
-        }
-    )
+    return Response(content=_DEFAULT_STATE_JSON, media_type="application/json")
+
+
+def _event_ts(ev):
+    return ev.get("ts", 0)
 
 
 @app.get("/events")
-async def events():
+async def events(limit: Optional[int] = None):
     if hub is not None:
         try:
             snapshot_result = hub.snapshot()
             if snapshot_result and len(snapshot_result) >= 3:
                 _, _, evs = snapshot_result
-                # Sort events by timestamp in descending order (most recent first)
+                # Sort events by timestamp in descending order (most recent first);
+                # with ?limit=K only the K most recent are selected, no full sort
                 if evs:
-                    sorted_events = sorted(
-                        evs, key=lambda x: x.get("ts", 0), reverse=True
-                    )
-                    return JSONResponse(sorted_events)
+                    if limit is not None:
+                        return JSONResponse(
+                            heapq.nlargest(max(limit, 0), evs, key=_event_ts)
+                        )
+                    return JSONResponse(sorted(evs, key=_event_ts, reverse=True))
                 return JSONResponse([])
         except Exception:
             pass
@@ -179,55 +256,63 @@ async def events():
 
 
 @app.get("/frame.jpg")
-async def frame():
+async def frame(request: Request):
     if hub is not None:
-        buf = hub.get_jpeg(quality=80)
+        # Read the sequence number before the JPEG: if a frame lands in
+        # between, the newer image goes out under the older tag and is merely
+        # sent again next time, never the other way round
+        etag = '"%s-%d"' % (_FRAME_ETAG_PREFIX, hub.frame_seq)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", **_IDENTITY}
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        # Encoding is CPU work: keep it off the event loop, as the MJPEG
+        # stream does
+        loop = asyncio.get_running_loop()
+        buf = await loop.run_in_executor(None, hub.get_jpeg, 80)
         if buf is not None:
-            return Response(content=buf, media_type="image/jpeg")
-
-    # Create placeholder image
-    import cv2
-    import numpy as np
+            return Response(content=buf, media_type="image/jpeg", headers=headers)
 
-    img = np.zeros((480, 640, 3), dtype=np.uint8)
-    cv2.putText(
-        img, "No camera", (250, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2
-    )
-    _, buf = cv2.imencode(".jpg", img)
-    # Handle both numpy array and bytes (for testing)
-    if hasattr(buf, "tobytes"):
-        return Response(content=buf.tobytes(), media_type="image/jpeg")
-    else:
-        return Response(content=buf, media_type="image/jpeg")
+    headers = {"ETag": _NO_CAMERA_ETAG, "Cache-Control": "no-cache", **_IDENTITY}
+    if _etag_matches(request, _NO_CAMERA_ETAG):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_NO_CAMERA_JPEG, media_type="image/jpeg", headers=headers)
 
 
 @app.get("/config")
-async def get_config():
+async def get_config(request: Request):
     """Get current configuration summary"""
-    return JSONResponse(
-        {
-            "camera": {"width": 1280, "height": 720, "fps": 30},
-            "detection": {"method": "HoughCircles"},
-            "calibration": {"markers": "ArUco 4x4_50"},
-            "web": {"version": "1.0"},
-        }
+    headers = {"ETag": _CONFIG_ETAG, "Cache-Control": "no-cache"}
+    if _etag_matches(request, _CONFIG_ETAG):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=_CONFIG_JSON, media_type="application/json", headers=headers
     )
 
 
 @app.get("/markers/download")
-async def download_markers():
+async def download_markers(request: Request):
     """Download the generated markers PDF"""
-    import os
-
     markers_pdf = "markers/markers_A4.pdf"
     if os.path.exists(markers_pdf):
-        with open(markers_pdf, "rb") as f:
-            content = f.read()
+        # Regenerating the PDF bumps its mtime, so it is stat'ed per request
+        try:
+            st = os.stat(markers_pdf)
+        except OSError:
+            return Response(status_code=404)
+        if _not_modified_since(request, st.st_mtime):
             return Response(
-                content=content,
-                media_type="application/pdf",
-                headers={"Content-Disposition": "attachment; filename=markers_A4.pdf"},
+                status_code=304,
+                headers={"Last-Modified": formatdate(st.st_mtime, usegmt=True)},
             )
+        # Streamed from disk in chunks rather than read into memory up front;
+        # the stat result supplies Content-Length, Last-Modified and ETag
+        return FileResponse(
+            markers_pdf,
+            media_type="application/pdf",
+            filename="markers_A4.pdf",
+            headers=_IDENTITY,
+            stat_result=st,
+        )
     return Response(status_code=404)
 
 
@@ -275,75 +360,62 @@ async def health_check():
         )
 
 
+# Prometheus exposition text: the HELP/TYPE lines never change, so each
+# section is one bytes template filled in per scrape
+_METRICS_UPTIME = (
+    b"# HELP poolmind_uptime_seconds Application uptime in seconds\n"
+    b"# TYPE poolmind_uptime_seconds counter\n"
+    b"poolmind_uptime_seconds %r\n"
+)
+_METRICS_STATE = (
+    b"# HELP poolmind_camera_connected Camera connection status\n"
+    b"# TYPE poolmind_camera_connected gauge\n"
+    b"poolmind_camera_connected %d\n"
+    b"# HELP poolmind_balls_detected Total balls currently detected\n"
+    b"# TYPE poolmind_balls_detected gauge\n"
+    b"poolmind_balls_detected %d\n"
+    b"# HELP poolmind_frame_processing_time_seconds Frame processing time\n"
+    b"# TYPE poolmind_frame_processing_time_seconds gauge\n"
+    b"poolmind_frame_processing_time_seconds %r\n"
+    b"# HELP poolmind_detection_accuracy_percent Detection accuracy percent\n"
+    b"# TYPE poolmind_detection_accuracy_percent gauge\n"
+    b"poolmind_detection_accuracy_percent %r\n"
+)
+_METRICS_EVENTS = (
+    b"# HELP poolmind_events_total Total number of game events\n"
+    b"# TYPE poolmind_events_total counter\n"
+    b"poolmind_events_total %d\n"
+)
+
+
+def _gauge(value):
+    """value as a plain int or float, which %r renders as str() would;
+    missing (None) values read as 0"""
+    value = value or 0
+    return value if type(value) in (int, float) else float(value)
+
+
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint"""
     try:
-        metrics_data = []
-
-        # Basic application metrics
-        metrics_data.append(
-            "# HELP poolmind_uptime_seconds Application uptime in seconds"
-        )
-        metrics_data.append("# TYPE poolmind_uptime_seconds counter")
-        metrics_data.append(f"poolmind_uptime_seconds {time.time()}")
+        body = _METRICS_UPTIME % time.time()
 
         if hub is not None:
             _, state, events = hub.snapshot()
 
             if state:
-                # Camera connectivity
-                metrics_data.append(
-                    "# HELP poolmind_camera_connected Camera connection status"
-                )
-                metrics_data.append("# TYPE poolmind_camera_connected gauge")
-                camera_connected = 1 if state.get("camera_connected", False) else 0
-                metrics_data.append(f"poolmind_camera_connected {camera_connected}")
-
-                # Ball detection metrics
-                metrics_data.append(
-                    "# HELP poolmind_balls_detected Total balls currently detected"
-                )
-                metrics_data.append("# TYPE poolmind_balls_detected gauge")
-                active_balls = state.get("active_balls", 0)
-                metrics_data.append(f"poolmind_balls_detected {active_balls}")
-
-                # Frame processing time
-                help_text = (
-                    "# HELP poolmind_frame_processing_time_seconds "
-                    "Frame processing time"
-                )
-                metrics_data.append(help_text)
-                metrics_data.append(
-                    "# TYPE poolmind_frame_processing_time_seconds gauge"
-                )
-                processing_time = state.get("processing_time", 0)
-                metrics_data.append(
-                    f"poolmind_frame_processing_time_seconds {processing_time}"
+                body += _METRICS_STATE % (
+                    1 if state.get("camera_connected", False) else 0,
+                    int(state.get("active_balls") or 0),
+                    _gauge(state.get("processing_time")),
+                    _gauge(state.get("detection_accuracy")),
                 )
 
-                # Detection accuracy
-                help_text = (
-                    "# HELP poolmind_detection_accuracy_percent "
-                    "Detection accuracy percent"
-                )
-                metrics_data.append(help_text)
-                metrics_data.append("# TYPE poolmind_detection_accuracy_percent gauge")
-                detection_accuracy = state.get("detection_accuracy", 0)
-                metrics_data.append(
-                    f"poolmind_detection_accuracy_percent {detection_accuracy}"
-                )
-
-            # Event metrics
             if events:
-                metrics_data.append(
-                    "# HELP poolmind_events_total Total number of game events"
-                )
-                metrics_data.append("# TYPE poolmind_events_total counter")
-                metrics_data.append(f"poolmind_events_total {len(events)}")
+                body += _METRICS_EVENTS % len(events)
 
-        content = "\n".join(metrics_data) + "\n"
-        return Response(content=content, media_type="text/plain")
+        return Response(content=body, media_type="text/plain; version=0.0.4")
     except Exception as e:
         return Response(
             status_code=500,
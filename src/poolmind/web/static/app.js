@@ -114,7 +114,7 @@ class PoolMindApp {
         try {
             const [stateResponse, eventsResponse] = await Promise.all([
                 fetch('/state'),
-                fetch('/events')
+                fetch('/events?limit=10')
             ]);
 
             if (!stateResponse.ok || !eventsResponse.ok) {
@@ -218,9 +218,8 @@ class PoolMindApp {
             return;
         }
 
-        const recentEvents = events.slice(-10).reverse();
-
-        container.innerHTML = recentEvents.map(event => {
+        // The server sends the most recent events first
+        container.innerHTML = events.map(event => {
             const time = new Date(event.ts * 1000).toLocaleTimeString();
             const { icon, color, description } = this.getEventDisplay(event);
 
@@ -9,6 +9,11 @@ import numpy as np
 import pytest
 import yaml
 
+try:
+    from yaml import CDumper as Dumper  # LibYAML C emitter
+except ImportError:
+    from yaml import Dumper
+
 from poolmind.app import main, parse_args
 
 
@@ -49,7 +54,7 @@ class TestPoolMindApp:
             },
         }
 
-        yaml.dump(self.config_data, self.temp_config)
+        yaml.dump(self.config_data, self.temp_config, Dumper=Dumper)
         self.temp_config.close()
 
     def test_parse_args_default(self):
@@ -200,7 +205,7 @@ class TestPoolMindApp:
         # Update config to enable fullscreen
         self.config_data["ui"]["fullscreen"] = True
         with open(self.temp_config.name, "w") as f:
-            yaml.dump(self.config_data, f)
+            yaml.dump(self.config_data, f, Dumper=Dumper)
 
         # Mock components (simplified)
         self._mock_components(
@@ -261,7 +266,7 @@ class TestPoolMindApp:
         # Enable web server in config
         self.config_data["web"]["enabled"] = True
         with open(self.temp_config.name, "w") as f:
-            yaml.dump(self.config_data, f)
+            yaml.dump(self.config_data, f, Dumper=Dumper)
 
         # Mock components
         self._mock_components(
@@ -343,7 +348,8 @@ class TestPoolMindApp:
 
         # Mock ball detection
         mock_detector_instance = Mock()
-        mock_detector_instance.detect.return_value = [(100, 200, 15), (300, 400, 15)]
+        detections = (np.array([[100, 200, 15], [300, 400, 15]]), ["cue", "solid"])
+        mock_detector_instance.detect_arrays.return_value = detections
         mock_detector.return_value = mock_detector_instance
 
         # Mock tracking
@@ -380,8 +386,8 @@ class TestPoolMindApp:
         # Verify the processing pipeline was executed
         mock_homography_instance.homography_from_frame.assert_called_once()
         mock_table_instance.warp.assert_called_once_with(test_frame, test_h)
-        mock_detector_instance.detect.assert_called_once_with(warped_frame)
-        mock_tracker_instance.update.assert_called_once()
+        mock_detector_instance.detect_arrays.assert_called_once_with(warped_frame)
+        mock_tracker_instance.update.assert_called_once_with(*detections)
         mock_engine_instance.update.assert_called_once()
         mock_overlay_instance.draw.assert_called_once()
         mock_hub_instance.update_frame.assert_called_once()
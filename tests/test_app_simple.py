@@ -2,13 +2,19 @@
 Tests for PoolMind Main Application
 """
 import tempfile
+from contextlib import ExitStack
 from unittest.mock import Mock, patch
 
 import cv2
 import numpy as np
 import yaml
 
-from poolmind.app import main, parse_args
+try:
+    from yaml import CDumper as Dumper  # LibYAML C emitter
+except ImportError:
+    from yaml import Dumper
+
+from poolmind.app import _pipelined_frames, _serial_frames, main
 
 
 class TestPoolMindApp:
@@ -33,24 +39,10 @@ class TestPoolMindApp:
             "game": {"pocket_radius": 25},
             "web": {"enabled": False},
         }
-        yaml.dump(self.config_data, self.temp_config)
+        yaml.dump(self.config_data, self.temp_config, Dumper=Dumper)
         self.temp_config.close()
 
-    def test_parse_args_default(self):
-        """Test argument parsing with default config path"""
-        with patch("sys.argv", ["app.py"]):
-            args = parse_args()
-            assert args.config == "config/config.yaml"
-
-    def test_parse_args_custom_config(self):
-        """Test argument parsing with custom config path"""
-        test_config = "/path/to/custom/config.yaml"
-        with patch("sys.argv", ["app.py", "--config", test_config]):
-            args = parse_args()
-            assert args.config == test_config
-
-    @patch("poolmind.app.yaml.safe_load")
-    @patch("builtins.open")
+    @patch("poolmind.app.load_config")
     @patch("poolmind.app.Camera")
     @patch("poolmind.app.MarkerHomography")
     @patch("poolmind.app.cv2.namedWindow")
@@ -61,11 +53,10 @@ class TestPoolMindApp:
         mock_window,
         mock_homography,
         mock_camera,
-        mock_open,
-        mock_yaml_load,
+        mock_load_config,
     ):
         """Test configuration file loading"""
-        mock_yaml_load.return_value = self.config_data
+        mock_load_config.return_value = self.config_data
 
         # Mock camera to avoid actual camera initialization
         mock_camera_instance = Mock()
@@ -82,8 +73,7 @@ class TestPoolMindApp:
         with patch("sys.argv", ["app.py", "--config", "test.yaml"]):
             main()
 
-        mock_open.assert_called_with("test.yaml", "r")
-        mock_yaml_load.assert_called_once()
+        mock_load_config.assert_called_once_with("test.yaml")
 
     @patch("cv2.destroyAllWindows")
     @patch("cv2.waitKey", return_value=27)  # ESC key
@@ -100,83 +90,51 @@ class TestPoolMindApp:
         mock_namedwindow.assert_called_once_with("PoolMind", cv2.WINDOW_NORMAL)
         mock_destroy.assert_called_once()
 
-    @patch("cv2.setWindowProperty")
     @patch("cv2.destroyAllWindows")
     @patch("cv2.waitKey", return_value=27)
     @patch("cv2.imshow")
     @patch("cv2.namedWindow")
-    def test_fullscreen_mode(
-        self,
-        mock_namedwindow,
-        mock_imshow,
-        mock_waitkey,
-        mock_destroy,
-        mock_setwindowprop,
+    def test_opengl_window_fallback(
+        self, mock_namedwindow, mock_imshow, mock_waitkey, mock_destroy
     ):
-        """Test fullscreen mode setup"""
-        # Enable fullscreen in config
-        self.config_data["ui"]["fullscreen"] = True
+        """Test OpenGL window falls back to a normal window when unsupported"""
+        self.config_data["ui"]["opengl"] = True
         with open(self.temp_config.name, "w") as f:
-            yaml.dump(self.config_data, f)
+            yaml.dump(self.config_data, f, Dumper=Dumper)
 
+        mock_namedwindow.side_effect = [cv2.error("No OpenGL support"), None]
         with self._patch_all_components():
             with patch("sys.argv", ["app.py", "--config", self.temp_config.name]):
                 main()
 
-        mock_setwindowprop.assert_called_once_with(
-            "PoolMind", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN
+        assert mock_namedwindow.call_args_list[0].args == (
+            "PoolMind",
+            cv2.WINDOW_NORMAL | cv2.WINDOW_OPENGL,
         )
-
-    @patch("threading.Thread")
-    @patch("cv2.destroyAllWindows")
-    @patch("cv2.waitKey", return_value=27)
-    @patch("cv2.imshow")
-    @patch("cv2.namedWindow")
-    def test_web_server_startup(
-        self, mock_namedwindow, mock_imshow, mock_waitkey, mock_destroy, mock_thread
-    ):
-        """Test web server thread startup when enabled"""
-        # Enable web server
-        self.config_data["web"]["enabled"] = True
-        with open(self.temp_config.name, "w") as f:
-            yaml.dump(self.config_data, f)
-
-        mock_thread_instance = Mock()
-        mock_thread.return_value = mock_thread_instance
-
-        with self._patch_all_components():
-            with patch("sys.argv", ["app.py", "--config", self.temp_config.name]):
-                main()
-
-        mock_thread.assert_called_once()
-        mock_thread_instance.start.assert_called_once()
+        mock_namedwindow.assert_called_with("PoolMind", cv2.WINDOW_NORMAL)
 
     def _patch_all_components(self):
         """Context manager to patch all component classes"""
-        patches = [
-            patch("poolmind.app.Camera", return_value=self._mock_camera()),
-            patch(
-                "poolmind.app.MarkerHomography", return_value=self._mock_homography()
-            ),
-            patch("poolmind.app.TableGeometry", return_value=Mock()),
-            patch("poolmind.app.BallDetector", return_value=Mock()),
-            patch("poolmind.app.CentroidTracker", return_value=Mock()),
-            patch("poolmind.app.Overlay", return_value=self._mock_overlay()),
-            patch("poolmind.app.ReplayRecorder", return_value=Mock()),
-            patch("poolmind.app.GameEngine", return_value=self._mock_engine()),
-            patch("poolmind.app.FrameHub", return_value=Mock()),
-        ]
-
-        class PatchContext:
-            def __enter__(self):
-                self.mocks = [p.__enter__() for p in patches]
-                return self.mocks
-
-            def __exit__(self, exc_type, exc_val, exc_tb):
-                for p in reversed(patches):
-                    p.__exit__(exc_type, exc_val, exc_tb)
-
-        return PatchContext()
+        components = {
+            "Camera": self._mock_camera(),
+            "MarkerHomography": self._mock_homography(),
+            "TableGeometry": Mock(),
+            "BallDetector": Mock(),
+            "CentroidTracker": Mock(),
+            "Overlay": self._mock_overlay(),
+            "ReplayRecorder": Mock(),
+            "GameEngine": self._mock_engine(),
+            "FrameHub": Mock(),
+        }
+        stack = ExitStack()
+        # The patched classes, to check how main() constructed them
+        self.component_mocks = {
+            name: stack.enter_context(
+                patch(f"poolmind.app.{name}", return_value=instance)
+            )
+            for name, instance in components.items()
+        }
+        return stack
 
     def _mock_homography(self):
         """Create a mock homography that returns proper tuple"""
@@ -208,33 +166,70 @@ class TestPoolMindApp:
 
     def test_component_initialization_parameters(self):
         """Test that components are initialized with correct config parameters"""
-        with self._patch_all_components():
-            with patch("poolmind.app.cv2.namedWindow"):
-                with patch("poolmind.app.cv2.setWindowProperty"):
-                    with patch("poolmind.app.cv2.imshow"):
-                        with patch(
-                            "poolmind.app.cv2.waitKey", return_value=27
-                        ):  # ESC to exit
-                            with patch("poolmind.app.cv2.destroyAllWindows"):
-                                with patch("threading.Thread") as mock_thread:
-                                    mock_thread.return_value = Mock()
-                                    with patch("uvicorn.run"):
-                                        with patch(
-                                            "sys.argv",
-                                            [
-                                                "app.py",
-                                                "--config",
-                                                self.temp_config.name,
-                                            ],
-                                        ):
-                                            try:
-                                                main()
-                                            except (
-                                                AttributeError,
-                                                ValueError,
-                                                ImportError,
-                                            ):
-                                                pass  # Expected due to mocking
+        argv = ["app.py", "--config", self.temp_config.name]
+        with ExitStack() as stack:
+            stack.enter_context(self._patch_all_components())
+            for name in ("namedWindow", "setWindowProperty", "imshow"):
+                stack.enter_context(patch(f"poolmind.app.cv2.{name}"))
+            # ESC to exit
+            stack.enter_context(patch("poolmind.app.cv2.waitKey", return_value=27))
+            stack.enter_context(patch("poolmind.app.cv2.destroyAllWindows"))
+            stack.enter_context(patch("sys.argv", argv))
+            main()
+
+        cfg = self.config_data
+        mocks = self.component_mocks
+        mocks["Camera"].assert_called_once_with(index=0, width=1280, height=720, fps=30)
+        mocks["MarkerHomography"].assert_called_once_with(cfg["calibration"])
+        mocks["TableGeometry"].assert_called_once_with(cfg["calibration"])
+        mocks["BallDetector"].assert_called_once_with(cfg["detection"])
+        mocks["CentroidTracker"].assert_called_once_with(cfg["tracking"])
+        table = mocks["TableGeometry"].return_value
+        mocks["Overlay"].assert_called_once_with(cfg["ui"], table)
+        mocks["ReplayRecorder"].assert_called_once_with(cfg["replay"], cfg["camera"])
+        mocks["GameEngine"].assert_called_once_with(table, cfg["game"])
+
+    def _pipeline_components(self, n_frames):
+        """Create fake capture/detection components tagging each frame"""
+        cap = Mock()
+        cap.frames.return_value = iter(
+            [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(n_frames)]
+        )
+        calib = Mock()
+        calib.homography_from_frame.side_effect = lambda f: (np.eye(3), None, None)
+        table = Mock()
+        table.warp.side_effect = lambda f, H: f
+        detector = Mock()
+        detector.detect_arrays.side_effect = lambda w: (
+            np.array([[w[0, 0, 0], 0, 10]]),
+            ["cue"],
+        )
+        # Like CentroidTracker, hand back the same dict updated in place
+        objects = {}
+
+        def update(xyr, labels):
+            objects.clear()
+            objects[0] = tuple(xyr[0].tolist()) + (labels[0],)
+            return objects
+
+        tracker = Mock()
+        tracker.update.side_effect = update
+        return cap, calib, table, detector, tracker
+
+    def test_pipelined_frames_keeps_frame_and_tracks_together(self):
+        """Test threaded pipeline yields each frame with its own detections"""
+        components = self._pipeline_components(50)
+        results = list(_pipelined_frames(*components, queue_size=2))
+
+        seen = [int(frame[0, 0, 0]) for frame, *_ in results]
+        assert seen == sorted(seen)
+        assert seen[-1] == 49  # newest frame is never dropped
+        for frame, H, H_inv, warped, dbg_mrk, tracks in results:
+            assert tracks[0][0] == frame[0, 0, 0]
+        assert len({id(tracks) for *_, tracks in results}) == len(results)
+
+        serial = [dict(t) for *_, t in _serial_frames(*self._pipeline_components(3))]
+        assert serial == [{0: (i, 0, 10, "cue")} for i in range(3)]
 
     def teardown_method(self):
         """Clean up test files"""
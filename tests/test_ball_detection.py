@@ -3,6 +3,7 @@ Tests for PoolMind ball detection functionality
 """
 from unittest.mock import Mock, patch
 
+import cv2
 import numpy as np
 import pytest
 
@@ -128,6 +129,42 @@ class TestBallDetector:
 
             assert result == "unknown"
 
+    def test_classify_ball_colors_matches_single(self):
+        """Test batched classification matches per-ball classification"""
+        rng = np.random.default_rng(0)
+        test_image = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+        test_image[10:30, 10:30] = (255, 255, 255)
+        test_image[30:50, 40:60] = (0, 0, 200)
+        circles = [[20, 20, 10], [50, 40, 9], [5, 5, 8], [100, 100, 8], [70, 55, 12]]
+
+        result = self.detector._classify_ball_colors(test_image, circles)
+
+        expected = [
+            self.detector._classify_ball_color(test_image, x, y, r)
+            for x, y, r in circles
+        ]
+        assert result == expected
+        assert result[:2] == ["cue", "solid"]
+        assert result[3] == "unknown"
+
+    def test_empty_table_gate_skips_hough(self):
+        """Test calibrate_empty skips HoughCircles only while the table is empty"""
+        table = np.full((200, 400, 3), (34, 139, 34), dtype=np.uint8)
+        cv2.rectangle(table, (0, 0), (399, 199), (19, 69, 139), 12)
+
+        thresholds = self.detector.calibrate_empty(table)
+        assert np.array(thresholds).shape == (4, 8)
+
+        with_ball = table.copy()
+        cv2.circle(with_ball, (210, 90), 12, (255, 255, 255), -1)
+        with patch(
+            "poolmind.detect.balls.cv2.HoughCircles", return_value=None
+        ) as hough:
+            assert self.detector.detect(table) == []
+            hough.assert_not_called()
+            self.detector.detect(with_ball)
+            hough.assert_called_once()
+
     def test_classify_ball_color_empty_roi(self):
         """Test classification with empty ROI"""
         test_image = np.zeros((10, 10, 3), dtype=np.uint8)
@@ -136,3 +173,43 @@ class TestBallDetector:
         result = self.detector._classify_ball_color(test_image, 50, 50, 5)
 
         assert result == "unknown"
+
+    def test_color_method_default_is_hough(self):
+        """Test Hough remains the default detection method"""
+        assert self.detector.method == "hough"
+        assert BallDetector({"method": "color"}).method == "color"
+
+    def test_detect_by_color_segmentation(self):
+        """Test colour-segmentation detection finds and classifies balls"""
+        detector = BallDetector({"method": "color"})
+
+        # Green felt with one ball of each class
+        image = np.zeros((200, 400, 3), dtype=np.uint8)
+        image[:] = (34, 139, 34)
+        cv2.circle(image, (50, 100), 12, (255, 255, 255), -1)  # cue
+        cv2.circle(image, (150, 100), 12, (0, 0, 255), -1)  # red solid
+        cv2.circle(image, (250, 100), 12, (255, 0, 0), -1)  # blue stripe
+        cv2.circle(image, (350, 100), 12, (0, 0, 0), -1)  # eight
+
+        result = detector.detect(image)
+
+        by_type = {ball[3]: ball for ball in result}
+        assert set(by_type) == {"cue", "solid", "stripe", "eight"}
+        for (x, y, r, _), expected_x in zip(
+            [by_type[t] for t in ("cue", "solid", "stripe", "eight")],
+            (50, 150, 250, 350),
+        ):
+            assert abs(x - expected_x) <= 1
+            assert abs(y - 100) <= 1
+            assert 10 <= r <= 14
+
+    def test_detect_by_color_filters_by_size(self):
+        """Test colour blobs outside the ball radius range are ignored"""
+        detector = BallDetector({"method": "color"})
+
+        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        image[:] = (34, 139, 34)
+        cv2.circle(image, (50, 50), 3, (255, 255, 255), -1)  # too small
+        cv2.circle(image, (130, 130), 40, (255, 255, 255), -1)  # too large
+
+        assert detector.detect(image) == []
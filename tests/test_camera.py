@@ -139,6 +139,49 @@ class TestCamera:
 
         camera.release()
 
+    @patch("cv2.VideoCapture")
+    def test_capture_triple_buffering(self, mock_videocapture):
+        """Test frames() hands out capture buffers without copying or reuse"""
+        mock_cap = Mock()
+        mock_videocapture.return_value = mock_cap
+
+        allowed = threading.Semaphore(0)  # one permit per frame to capture
+        allocated = []
+        count = 0
+
+        def read(image=None):
+            nonlocal count
+            if not allowed.acquire(timeout=0.05):
+                return False, None
+            if image is None:
+                image = np.empty((4, 4, 3), dtype=np.uint8)
+                allocated.append(image)
+            count += 1
+            image[...] = count
+            return True, image
+
+        mock_cap.read.side_effect = read
+
+        camera = Camera()
+        frame_generator = camera.frames()
+        for expected in range(1, 8):
+            allowed.release()
+            frame = next(frame_generator)  # waits for the new frame
+            assert frame[0, 0, 0] == expected
+            assert not frame.flags.writeable
+
+        # Frames captured while one is held never overwrite it
+        allowed.release()
+        allowed.release()
+        time.sleep(0.1)
+        assert frame[0, 0, 0] == 7
+        assert next(frame_generator)[0, 0, 0] == 9  # only the latest is yielded
+
+        # Decoding target, latest frame and the consumer's frame
+        assert len(allocated) <= 3
+
+        camera.release()
+
     @patch("cv2.VideoCapture")
     @patch("time.sleep")
     def test_frames_generator_no_frame(self, mock_sleep, mock_videocapture):
@@ -233,7 +276,7 @@ class TestCamera:
 
         frame_counter = 0
 
-        def mock_read():
+        def mock_read(image=None):
             nonlocal frame_counter
             frame_counter += 1
             frame = np.full((720, 1280, 3), frame_counter % 256, dtype=np.uint8)
@@ -0,0 +1,43 @@
+"""
+Tests for PoolMind configuration loading
+"""
+import os
+
+import yaml
+
+from poolmind.util.cfg import load_config
+
+
+class TestLoadConfig:
+    """Test cases for load_config"""
+
+    def test_load_config_parses_yaml(self, tmp_path):
+        """Test config file is parsed into a dict"""
+        path = tmp_path / "config.yaml"
+        path.write_text(yaml.dump({"camera": {"index": 0, "fps": 30}}))
+
+        cfg = load_config(str(path))
+
+        assert cfg == {"camera": {"index": 0, "fps": 30}}
+
+    def test_load_config_cached(self, tmp_path):
+        """Test unchanged files are not re-parsed"""
+        path = tmp_path / "config.yaml"
+        path.write_text(yaml.dump({"web": {"enabled": True}}))
+
+        assert load_config(str(path)) is load_config(str(path))
+
+    def test_load_config_reloads_on_change(self, tmp_path):
+        """Test an edited file is parsed again"""
+        path = tmp_path / "config.yaml"
+        path.write_text(yaml.dump({"web": {"enabled": True}}))
+        first = load_config(str(path))
+
+        path.write_text(yaml.dump({"web": {"enabled": False, "port": 9000}}))
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        second = load_config(str(path))
+
+        assert first == {"web": {"enabled": True}}
+        assert second == {"web": {"enabled": False, "port": 9000}}
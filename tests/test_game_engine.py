@@ -52,8 +52,8 @@ class TestGameEngine:
         # Check track history was updated
         assert 1 in self.engine.track_history
         assert 2 in self.engine.track_history
-        assert self.engine.track_history[1] == [(100, 100)]
-        assert self.engine.track_history[2] == [(150, 150)]
+        assert list(self.engine.track_history[1]) == [(100, 100)]
+        assert list(self.engine.track_history[2]) == [(150, 150)]
 
         # Check ball types were recorded
         assert self.engine.ball_types[1] == "cue"
@@ -95,6 +95,19 @@ class TestGameEngine:
         assert self.engine.score["potted"] == 1
         assert self.engine.score["solid_potted"] == 1
 
+    def test_was_near_pocket_across_grid_cells(self):
+        """Test pocket lookup reaches the full capture radius across grid cells"""
+        reach = 20 * 1.2
+        for (x, y), expected in [
+            ((50 + reach - 1, 50), True),
+            ((50, 50 - reach + 1), True),
+            ((50 + reach + 1, 50), False),
+            ((125, 50), False),
+            ((200 - reach + 1, 50), True),
+        ]:
+            self.engine.track_history[1] = [(x, y)]
+            assert self.engine._was_near_pocket(1) is expected
+
     def test_ball_potting_away_from_pocket(self):
         """Test ball not potted when far from pocket"""
         # Add ball far from any pocket
@@ -143,6 +156,24 @@ class TestGameEngine:
         assert state["solid_potted"] == 1
         assert state["active_balls"] == 0
 
+    def test_active_counts_follow_type_changes_pots_and_reset(self):
+        """Test running active counts track reclassification, pots and reset"""
+        self.engine.update({1: (55, 55, 10, "solid"), 2: (300, 300, 10, "cue")})
+        self.engine.update({1: (55, 55, 10, "stripe"), 2: (300, 300, 10, "cue")})
+        state = self.engine.get_state()
+        assert (state["active_solid"], state["active_stripe"]) == (0, 1)
+
+        for _ in range(self.engine.max_disappeared_for_pot):
+            self.engine.update({2: (300, 300, 10, "cue")})
+        state = self.engine.get_state()
+        assert state["active_balls"] == 1
+        assert state["active_stripe"] == 0
+
+        self.engine.reset_game()
+        state = self.engine.get_state()
+        assert state["active_balls"] == 2
+        assert state["active_stripe"] == 1
+
     def test_reset_game(self):
         """Test game reset functionality"""
         # Add some game state
@@ -191,8 +222,10 @@ class TestGameEngine:
             tracks[1] = (100 + i, 100, 10, "cue")
             self.engine.update(tracks)
 
-        # History should be limited to 120 entries
+        # History should be limited to the latest 120 entries
         assert len(self.engine.track_history[1]) == 120
+        assert self.engine.track_history[1][0] == (130, 100)
+        assert self.engine.track_history[1][-1] == (249, 100)
 
     def test_cue_ball_scratch_detection(self):
         """Test special handling for cue ball potting (scratch)"""
@@ -1,7 +1,7 @@
 """
 Tests for PoolMind ArUco marker detection and calibration
 """
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pytest
@@ -80,6 +80,64 @@ class TestMarkerHomography:
 
         np.testing.assert_array_almost_equal(result, expected, decimal=6)
 
+    def test_homography_from_frame_marker_centers(self):
+        """Test marker centers are matched to corner IDs regardless of order"""
+        homography = MarkerHomography({**self.config, "detect_scale": 1.0})
+        if not getattr(homography, "_use_new_api", False):
+            pytest.skip("ArUco detector API not available")
+
+        centers = {0: (100, 50), 1: (500, 60), 2: (520, 400), 3: (90, 380)}
+        detected = [2, 7, 0, 3, 1]
+        corners = []
+        for i in detected:
+            cx, cy = centers.get(i, (300, 200))
+            square = [[cx - 5, cy - 5], [cx + 5, cy - 5], [cx + 5, cy + 5]]
+            square.append([cx - 5, cy + 5])
+            corners.append(np.array([square], dtype=np.float32))
+        ids = np.array(detected, dtype=np.int32).reshape(-1, 1)
+
+        test_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        homography.detector = MagicMock()
+        homography.detector.detectMarkers.return_value = (corners, ids, None)
+        result_h, result_h_inv, debug = homography.homography_from_frame(test_frame)
+
+        src = np.array([centers[i] for i in range(4)], dtype=np.float32)
+        projected = src @ result_h[:, :2].T + result_h[:, 2]
+        projected = projected[:, :2] / projected[:, 2:]
+        np.testing.assert_array_almost_equal(projected, homography._dst_pts, decimal=3)
+        np.testing.assert_array_almost_equal(result_h_inv @ result_h, np.eye(3))
+        assert debug is not None
+
+    def test_homography_from_frame_keeps_last_good_on_singular(self):
+        """Test collinear marker centers leave the previous calibration alone"""
+        homography = MarkerHomography({**self.config, "detect_scale": 1.0})
+        if not getattr(homography, "_use_new_api", False):
+            pytest.skip("ArUco detector API not available")
+
+        def markers(centers):
+            corners = []
+            for cx, cy in centers:
+                square = [[cx - 5, cy - 5], [cx + 5, cy - 5], [cx + 5, cy + 5]]
+                square.append([cx - 5, cy + 5])
+                corners.append(np.array([square], dtype=np.float32))
+            return corners, np.arange(4, dtype=np.int32).reshape(-1, 1), None
+
+        test_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        homography.detector = MagicMock()
+        homography.detector.detectMarkers.return_value = markers(
+            [(100, 50), (500, 60), (520, 400), (90, 380)]
+        )
+        good_h, good_h_inv, _ = homography.homography_from_frame(test_frame)
+
+        homography.detector.detectMarkers.return_value = markers(
+            [(100, 100), (200, 200), (300, 300), (400, 400)]
+        )
+        result_h, result_h_inv, debug = homography.homography_from_frame(test_frame)
+
+        assert result_h is good_h
+        assert result_h_inv is good_h_inv
+        assert debug is None
+
     def test_custom_corner_ids(self):
         """Test MarkerHomography with custom corner IDs"""
         config = {
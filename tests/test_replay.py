@@ -157,6 +157,30 @@ class TestReplayRecorder:
 
         mock_popen.assert_not_called()
         assert recorder.cooldown == 9  # Decremented
+        mock_cvtcolor.assert_not_called()  # Frame skipped entirely
+
+        # The first frame after the cooldown only primes the comparison
+        recorder.cooldown = 1
+        recorder.process_frame(test_frame)
+        assert recorder.prev_gray is None
+        recorder.process_frame(test_frame)
+        mock_popen.assert_not_called()
+        recorder.process_frame(test_frame)
+        mock_popen.assert_called_once()
+
+    @patch("subprocess.Popen")
+    def test_motion_score_on_subsampled_frame(self, mock_popen):
+        """Test motion is scored on a 4x subsampled frame at full-frame scale"""
+        recorder = ReplayRecorder(self.replay_config, self.cam_config)
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+        recorder.process_frame(frame)
+        assert recorder.prev_gray.shape == (180, 320)
+
+        # A quarter of the frame brightens by 100: mean difference of 25
+        frame[:360, :640] = 100
+        recorder.process_frame(frame)
+        mock_popen.assert_called_once()
 
     @patch("cv2.cvtColor")
     def test_process_frame_disabled(self, mock_cvtcolor):
@@ -45,6 +45,20 @@ class TestTableGeometry:
         assert warped is not None
         assert warped.shape == (self.table.h, self.table.w, 3)
 
+    def test_warp_reuses_buffer(self):
+        """Test warping writes into the same preallocated buffer each call"""
+        frame = np.full((480, 640, 3), 7, dtype=np.uint8)
+        H = np.eye(3, dtype=np.float64)
+
+        first = self.table.warp(frame, H)
+        second = self.table.warp(frame, H)
+
+        assert first is second
+        assert second[0, 0, 0] == 7
+
+        gray = self.table.warp(frame[:, :, 0], H)
+        assert gray.shape == (self.table.h, self.table.w)
+
     def test_warp_frame_with_none_homography(self):
         """Test frame warping with None homography"""
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
@@ -51,6 +51,46 @@ class TestCentroidTracker:
         assert result[1] == (50, 50, 10, "cue")
         assert result[2] == (100, 100, 12, "solid")
 
+    def test_update_with_detection_arrays(self):
+        """Test (N, 3) arrays from BallDetector.detect_arrays track like tuples"""
+        tuples = CentroidTracker(self.config)
+        tuples.update([(50, 50, 10, "cue"), (100, 100, 12, "solid")])
+        tuples.update([(105, 98, 12, "solid"), (300, 300, 11, "stripe")])
+
+        self.tracker.update(np.array([[50, 50, 10], [100, 100, 12]]), ["cue", "solid"])
+        result = self.tracker.update(
+            np.array([[105, 98, 12], [300, 300, 11]], dtype=np.int32),
+            ["solid", "stripe"],
+        )
+        assert result == tuples.objects
+        assert all(type(v) is int for obj in result.values() for v in obj[:3])
+
+        self.tracker.update(np.empty((0, 3), dtype=np.int32), [])
+        assert self.tracker.disappeared == {1: 2, 2: 1, 3: 1}
+
+    def test_matching_is_optimal_with_scipy(self):
+        """Test Hungarian matching keeps both objects where greedy loses one"""
+        pytest.importorskip("scipy")
+        self.tracker.update([(0, 0, 10), (30, 0, 10)])
+
+        result = self.tracker.update([(25, 0, 10), (55, 0, 10)])
+
+        assert result[1][:2] == (25, 0)
+        assert result[2][:2] == (55, 0)
+        assert 3 not in result
+
+    def test_centroid_rows_follow_objects(self):
+        """Test the centroid array stays aligned with objects as they change"""
+        tracker = CentroidTracker({"max_disappeared": 1, "max_distance": 40})
+        tracker.update([(50, 50, 10), (100, 100, 12)])
+        tracker.update([(104, 98, 12), (300, 300, 11)])
+        tracker.update([(300, 305, 11)])
+        tracker.update([])
+
+        assert list(tracker.objects) == [3]
+        assert tracker._ids == [3]
+        np.testing.assert_array_equal(tracker._xy, [[300, 305]])
+
     def test_update_no_detections(self):
         """Test updating with no detections"""
         # First add some objects
@@ -211,6 +211,10 @@ class TestOverlay:
         self.mock_table.default_pockets.assert_called_once_with(20)
         assert mock_circle.call_count >= 1
 
+        # Pocket centers are reused on later frames
+        self.overlay.draw_pockets(frame, h_matrix)
+        self.mock_table.default_pockets.assert_called_once_with(20)
+
     def test_draw_pockets_without_homography(self):
         """Test drawing pocket hints without homography"""
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
@@ -251,3 +255,19 @@ class TestOverlay:
         # Result should be a copy, not the same object
         assert result is not original_frame
         assert result.shape == original_frame.shape
+
+    def test_draw_alternates_reused_output_buffers(self):
+        """Test output buffers are reused in turn and the input is untouched"""
+        warped_bgr = np.zeros((400, 800, 3), dtype=np.uint8)
+        h_inv = np.eye(3, dtype=np.float32)
+        frames = [np.full((480, 640, 3), i, dtype=np.uint8) for i in range(3)]
+
+        results = [
+            self.overlay.draw(f, warped_bgr, h_inv, {}, 30.0, None) for f in frames
+        ]
+
+        assert results[0] is not results[1]
+        assert results[2] is results[0]
+        assert results[1][-1, -1, 0] == 1  # previous frame survives one call
+        assert results[2][-1, -1, 0] == 2
+        assert not frames[0].any()
@@ -1,9 +1,10 @@
 """
 Tests for PoolMind Web Hub functionality
 """
+import json
 import threading
 import time
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import cv2
 import numpy as np
@@ -17,6 +18,7 @@ class TestFrameHub:
     def setup_method(self):
         """Set up test fixtures"""
         self.hub = FrameHub(max_events=10)
+        self.hub._tj = None  # exercise the OpenCV encoder unless stated
 
     def test_hub_initialization(self):
         """Test hub initializes correctly"""
@@ -24,6 +26,7 @@ class TestFrameHub:
         assert self.hub.state == {}
         assert len(self.hub.events) == 0
         assert self.hub.events.maxlen == 10
+        assert self.hub.frame_seq == 0
 
     def test_update_frame_with_state(self):
         """Test updating frame with state"""
@@ -45,6 +48,7 @@ class TestFrameHub:
         assert self.hub.frame_bgr is not None
         assert np.array_equal(self.hub.frame_bgr, test_frame)
         assert self.hub.state == {}
+        assert self.hub.frame_seq == 1
 
     def test_push_event(self):
         """Test pushing events"""
@@ -85,6 +89,64 @@ class TestFrameHub:
             ".jpg", test_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 75]
         )
 
+    @patch("cv2.imencode")
+    def test_get_jpeg_encodes_once_per_frame_and_quality(self, mock_imencode):
+        """Test repeated polls reuse the encoded JPEG until the frame changes"""
+        test_frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        mock_imencode.return_value = (True, np.array([1, 2, 3, 4], dtype=np.uint8))
+
+        self.hub.update_frame(test_frame)
+        for _ in range(3):
+            assert self.hub.get_jpeg(quality=75) == bytes([1, 2, 3, 4])
+        assert mock_imencode.call_count == 1
+
+        self.hub.get_jpeg(quality=80)
+        assert mock_imencode.call_count == 2
+
+        self.hub.update_frame(test_frame)
+        self.hub.get_jpeg(quality=75)
+        assert mock_imencode.call_count == 3
+
+    @patch("cv2.imencode")
+    def test_get_jpeg_prefers_turbojpeg(self, mock_imencode):
+        """Test a TurboJPEG encoder is used instead of OpenCV when available"""
+        self.hub._tj = Mock()
+        self.hub._tj.encode.return_value = b"jpeg"
+        test_frame = np.zeros((100, 100, 3), dtype=np.uint8)
+
+        self.hub.update_frame(test_frame)
+        assert self.hub.get_jpeg(quality=70) == b"jpeg"
+        assert self.hub.get_jpeg(quality=70) == b"jpeg"
+
+        self.hub._tj.encode.assert_called_once()
+        assert self.hub._tj.encode.call_args.kwargs["quality"] == 70
+        mock_imencode.assert_not_called()
+
+    def test_update_frame_does_not_wait_for_encode(self):
+        """Test a slow encode neither blocks nor caches over a newer frame"""
+        self.hub.update_frame(np.zeros((10, 10, 3), dtype=np.uint8))
+        calls = []
+
+        def encode(frame, **kwargs):
+            calls.append(int(frame[0, 0, 0]))
+            if len(calls) == 1:
+                producer = threading.Thread(
+                    target=self.hub.update_frame,
+                    args=(np.full((10, 10, 3), 7, dtype=np.uint8),),
+                )
+                producer.start()
+                producer.join(timeout=2)
+                assert not producer.is_alive()
+            return b"jpeg%d" % len(calls)
+
+        self.hub._tj = Mock()
+        self.hub._tj.encode.side_effect = encode
+
+        # The frame that landed mid-encode is the one served and cached
+        assert self.hub.get_jpeg(quality=70) == b"jpeg2"
+        assert calls == [0, 7]
+        assert self.hub._jpeg_cache == {70: b"jpeg2"}
+
     @patch("cv2.imencode")
     def test_get_jpeg_failure(self, mock_imencode):
         """Test JPEG encoding failure"""
@@ -112,15 +174,32 @@ class TestFrameHub:
 
         frame_copy, state_copy, events_copy = self.hub.snapshot()
 
-        # Verify copies are independent
+        # Frame is a read-only view; state and events are independent copies
         assert frame_copy is not None
         assert np.array_equal(frame_copy, test_frame)
         assert frame_copy is not self.hub.frame_bgr
+        assert not frame_copy.flags.writeable
+        assert test_frame.flags.writeable
         assert state_copy == test_state
         assert state_copy is not self.hub.state
         assert len(events_copy) == 1
         assert events_copy[0]["type"] == "test_event"
 
+    def test_get_state_json_encodes_once_per_state(self):
+        """Test the state is JSON-encoded once until a new state is published"""
+        assert self.hub.get_state_json() == b"{}"
+
+        self.hub.update_frame(np.zeros((10, 10, 3), dtype=np.uint8), {"potted": 2})
+        first = self.hub.get_state_json()
+        assert json.loads(first) == {"potted": 2}
+        assert self.hub.get_state_json() is first
+
+        self.hub.update_frame(np.zeros((10, 10, 3), dtype=np.uint8))
+        assert self.hub.get_state_json() is first  # state kept without a new one
+
+        self.hub.update_frame(np.zeros((10, 10, 3), dtype=np.uint8), {"potted": 3})
+        assert json.loads(self.hub.get_state_json()) == {"potted": 3}
+
     def test_snapshot_no_frame(self):
         """Test snapshot when no frame is available"""
         test_state = {"active_balls": 0}
@@ -166,6 +245,26 @@ class TestFrameHub:
             assert isinstance(state, dict)
             assert isinstance(events, list)
 
+    def test_push_event_does_not_wait_for_frame_lock(self):
+        """Test events can be pushed while the frame lock is held"""
+        with self.hub.lock:
+            self.hub.push_event({"type": "pot"})
+        _, _, events = self.hub.snapshot()
+        assert [e["type"] for e in events] == ["pot"]
+
+    def test_snapshot_does_not_wait_for_frame_lock(self):
+        """Test snapshots are served while an encode holds the frame lock"""
+        self.hub.update_frame(np.zeros((10, 10, 3), dtype=np.uint8), {"potted": 1})
+        results = []
+        with self.hub.lock:
+            reader = threading.Thread(
+                target=lambda: results.append(self.hub.snapshot())
+            )
+            reader.start()
+            reader.join(timeout=2)
+        assert not reader.is_alive()
+        assert results[0][1] == {"potted": 1}
+
     def test_custom_maxlen(self):
         """Test hub with custom maxlen"""
         hub = FrameHub(max_events=3)
@@ -1,11 +1,15 @@
 """
 Tests for Web Server module
 """
+import asyncio
+import threading
 from unittest.mock import Mock, patch
 
+import numpy as np
 from fastapi.testclient import TestClient
 
 from poolmind.web import server
+from poolmind.web.hub import FrameHub
 
 
 class TestWebServer:
@@ -18,6 +22,7 @@ class TestWebServer:
 
         # Mock hub
         self.mock_hub = Mock()
+        self.mock_hub.frame_seq = 0
         server.hub = self.mock_hub
 
     def test_index_route_with_templates(self):
@@ -29,10 +34,13 @@ class TestWebServer:
     def test_state_endpoint_with_hub(self):
         """Test state endpoint with valid hub data"""
         mock_state = {"active_balls": 10, "game_state": "playing", "total_tracked": 15}
-        self.mock_hub.snapshot.return_value = (None, mock_state, [])
+        hub = FrameHub()
+        hub.update_frame(np.zeros((8, 8, 3), dtype=np.uint8), mock_state)
+        server.hub = hub
 
         response = self.client.get("/state")
         assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
 
         data = response.json()
         assert data == mock_state
@@ -52,7 +60,7 @@ class TestWebServer:
 
     def test_state_endpoint_hub_exception(self):
         """Test state endpoint when hub throws exception"""
-        self.mock_hub.snapshot.side_effect = Exception("Hub error")
+        self.mock_hub.get_state_json.side_effect = Exception("Hub error")
 
         response = self.client.get("/state")
         assert response.status_code == 200
@@ -80,6 +88,32 @@ class TestWebServer:
         ]
         assert data == expected_events
 
+    def test_events_endpoint_limit(self):
+        """Test events endpoint returns only the most recent events with limit"""
+        mock_events = [{"type": "pot", "ts": ts} for ts in (3, 1, 4, 5, 2)]
+        self.mock_hub.snapshot.return_value = (None, {}, mock_events)
+
+        response = self.client.get("/events?limit=2")
+        assert response.status_code == 200
+        assert [e["ts"] for e in response.json()] == [5, 4]
+
+        response = self.client.get("/events?limit=0")
+        assert response.json() == []
+
+    def test_events_endpoint_gzip(self):
+        """Test large JSON responses are gzipped, JPEG frames are not"""
+        mock_events = [{"type": "pot", "info": f"Ball {i}", "ts": i} for i in range(50)]
+        self.mock_hub.snapshot.return_value = (None, {}, mock_events)
+        self.mock_hub.get_jpeg.return_value = b"\xff\xd8" + b"\x00" * 2000
+
+        response = self.client.get("/events", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()) == 50
+
+        response = self.client.get("/frame.jpg", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "identity"
+        assert len(response.content) == 2002
+
     def test_events_endpoint_no_hub(self):
         """Test events endpoint when hub is None"""
         server.hub = None
@@ -111,39 +145,56 @@ class TestWebServer:
         assert response.status_code == 200
         assert response.headers["content-type"] == "image/jpeg"
         assert response.content == mock_frame_data
+        self.mock_hub.get_jpeg.assert_called_once_with(80)
 
     @patch("cv2.imencode")
-    @patch("cv2.putText")
-    @patch("numpy.zeros")
-    def test_frame_endpoint_no_hub(self, mock_zeros, mock_puttext, mock_imencode):
-        """Test frame endpoint when hub is None"""
+    def test_frame_endpoint_no_hub(self, mock_imencode):
+        """Test frame endpoint serves the pre-encoded placeholder without a hub"""
         server.hub = None
 
-        # Mock image creation
-        mock_zeros.return_value = "mock_image"
-        mock_imencode.return_value = (True, b"placeholder_image")
-
         response = self.client.get("/frame.jpg")
         assert response.status_code == 200
         assert response.headers["content-type"] == "image/jpeg"
-        assert response.content == b"placeholder_image"
+        assert response.content == server._NO_CAMERA_JPEG
+        assert response.content.startswith(b"\xff\xd8")  # JPEG SOI marker
+        mock_imencode.assert_not_called()
 
-    @patch("cv2.imencode")
-    @patch("cv2.putText")
-    @patch("numpy.zeros")
-    def test_frame_endpoint_hub_returns_none(
-        self, mock_zeros, mock_puttext, mock_imencode
-    ):
+    def test_frame_endpoint_hub_returns_none(self):
         """Test frame endpoint when hub returns None"""
         self.mock_hub.get_jpeg.return_value = None
 
-        # Mock placeholder image creation
-        mock_zeros.return_value = "mock_image"
-        mock_imencode.return_value = (True, b"placeholder_image")
-
         response = self.client.get("/frame.jpg")
         assert response.status_code == 200
         assert response.headers["content-type"] == "image/jpeg"
+        assert response.content == server._NO_CAMERA_JPEG
+
+    def test_frame_endpoint_not_modified(self):
+        """Test frame endpoint answers 304 until the hub publishes a new frame"""
+        self.mock_hub.get_jpeg.return_value = b"fake_jpeg_data"
+        self.mock_hub.frame_seq = 7
+
+        etag = self.client.get("/frame.jpg").headers["etag"]
+        self.mock_hub.get_jpeg.reset_mock()
+        response = self.client.get("/frame.jpg", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        self.mock_hub.get_jpeg.assert_not_called()
+
+        self.mock_hub.frame_seq = 8
+        response = self.client.get("/frame.jpg", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.content == b"fake_jpeg_data"
+        assert response.headers["etag"] != etag
+
+    def test_config_endpoint_not_modified(self):
+        """Test config endpoint answers 304 for a matching ETag"""
+        etag = self.client.get("/config").headers["etag"]
+
+        response = self.client.get("/config", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = self.client.get("/config", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
 
     def test_config_endpoint(self):
         """Test config endpoint returns expected configuration"""
@@ -161,21 +212,51 @@ class TestWebServer:
         assert data["camera"]["height"] == 720
         assert data["detection"]["method"] == "HoughCircles"
 
-    @patch("os.path.exists")
-    def test_markers_download_file_exists(self, mock_exists):
+    def test_placeholder_jpeg_without_static_dir(self, tmp_path, monkeypatch):
+        """Test the placeholders are drawn when the static files are missing"""
+        import cv2
+
+        monkeypatch.setattr(server, "static_dir", str(tmp_path / "missing"))
+
+        buf = server._placeholder_jpeg("no_camera.jpg", "No camera", (250, 240))
+        img = cv2.imdecode(np.frombuffer(buf, dtype=np.uint8), cv2.IMREAD_COLOR)
+        assert img.shape == (480, 640, 3)
+        assert img.max() > 128  # the white message
+
+    def test_markers_download_file_exists(self, tmp_path, monkeypatch):
         """Test markers download when file exists"""
-        mock_exists.return_value = True
+        (tmp_path / "markers").mkdir()
+        (tmp_path / "markers" / "markers_A4.pdf").write_bytes(b"pdf_content")
+        monkeypatch.chdir(tmp_path)
 
-        # Mock file reading
-        with patch("builtins.open", create=True) as mock_open:
-            mock_open.return_value.__enter__.return_value.read.return_value = (
-                b"pdf_content"
-            )
+        response = self.client.get("/markers/download")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert "attachment" in response.headers["content-disposition"]
+        assert response.headers["content-length"] == "11"
+        assert response.content == b"pdf_content"
 
-            response = self.client.get("/markers/download")
-            assert response.status_code == 200
-            assert response.headers["content-type"] == "application/pdf"
-            assert "attachment" in response.headers["content-disposition"]
+    def test_markers_download_not_modified(self, tmp_path, monkeypatch):
+        """Test markers download answers 304 while the PDF is unchanged"""
+        (tmp_path / "markers").mkdir()
+        (tmp_path / "markers" / "markers_A4.pdf").write_bytes(b"%PDF-1.4")
+        monkeypatch.chdir(tmp_path)
+
+        response = self.client.get("/markers/download")
+        assert response.status_code == 200
+        last_modified = response.headers["last-modified"]
+
+        response = self.client.get(
+            "/markers/download", headers={"If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+
+        response = self.client.get(
+            "/markers/download",
+            headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"},
+        )
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4"
 
     @patch("os.path.exists")
     def test_markers_download_file_not_exists(self, mock_exists):
@@ -194,6 +275,56 @@ class TestWebServer:
         assert "status" in data
         assert "reset" in data["status"].lower()
 
+    @patch("time.time", return_value=1700000000.5)
+    def test_metrics_endpoint(self, mock_time):
+        """Test metrics endpoint renders the Prometheus exposition format"""
+        state = {"camera_connected": True, "active_balls": 7, "processing_time": 0.02}
+        self.mock_hub.snapshot.return_value = (None, state, [{"type": "pot"}] * 3)
+
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        lines = response.text.splitlines()
+        assert "poolmind_uptime_seconds 1700000000.5" in lines
+        assert "# TYPE poolmind_camera_connected gauge" in lines
+        assert "poolmind_camera_connected 1" in lines
+        assert "poolmind_balls_detected 7" in lines
+        assert "poolmind_frame_processing_time_seconds 0.02" in lines
+        assert "poolmind_detection_accuracy_percent 0" in lines
+        assert "poolmind_events_total 3" in lines
+        assert response.text.endswith("\n")
+
+    def test_metrics_endpoint_missing_values(self):
+        """Test None and non-float state values still render as numbers"""
+        state = {
+            "active_balls": None,
+            "processing_time": np.float64(0.25),
+            "detection_accuracy": "97.5",
+        }
+        self.mock_hub.snapshot.return_value = (None, state, [])
+
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert "poolmind_camera_connected 0" in lines
+        assert "poolmind_balls_detected 0" in lines
+        assert "poolmind_frame_processing_time_seconds 0.25" in lines
+        assert "poolmind_detection_accuracy_percent 97.5" in lines
+
+        state["processing_time"] = None
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert "poolmind_frame_processing_time_seconds 0\n" in response.text
+
+    def test_metrics_endpoint_no_hub(self):
+        """Test metrics endpoint reports only uptime without a hub"""
+        server.hub = None
+
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert response.text.startswith("# HELP poolmind_uptime_seconds")
+        assert "poolmind_balls_detected" not in response.text
+
     def test_set_hub_function(self):
         """Test set_hub function"""
         new_hub = Mock()
@@ -257,6 +388,37 @@ class TestWebServer:
         assert response.status_code == 200
         assert "multipart/x-mixed-replace" in response.headers["content-type"]
 
+    def test_stream_sends_frames_as_they_arrive(self):
+        """Test the MJPEG stream follows the hub's frames, not a fixed rate"""
+        hub = FrameHub()
+        hub.update_frame(np.zeros((8, 8, 3), dtype=np.uint8))
+        server.set_hub(hub)
+
+        async def read_two_parts():
+            response = await server.stream()
+            parts = response.body_iterator
+            first = await parts.__anext__()
+            new_frame = np.full((8, 8, 3), 255, dtype=np.uint8)
+            threading.Timer(0.05, hub.update_frame, (new_frame,)).start()
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            second = await parts.__anext__()
+            elapsed = loop.time() - start
+            await parts.aclose()
+            return first, second, elapsed
+
+        response = asyncio.run(server.stream())
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["x-accel-buffering"] == "no"
+        assert response.headers["content-encoding"] == "identity"
+
+        first, second, elapsed = asyncio.run(read_two_parts())
+
+        assert first.startswith(b"--frame") and second.startswith(b"--frame")
+        assert first != second
+        assert elapsed < 0.5  # woken by the frame, not the 1 s keepalive
+        assert hub._listeners == []
+
     def teardown_method(self):
         """Clean up after tests"""
         # Restore hub to avoid affecting other tests